@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,6 +12,44 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     CACHE_TTL: int = 3600
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    BLOCKING_POOL_SIZE: int = 8
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_NEAR_MISS: float = 0.85
+    SEMANTIC_CACHE_TTL: int = 86400
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_TTL: int = 604800
+    EMBEDDING_CACHE_REDIS: bool = True
+    RERANK_MODEL: Optional[str] = None  # None = Flashrank default model
+    RERANK_TOP_N: int = 3
+    RERANK_BATCH_WINDOW_MS: int = 5
+    RERANK_MAX_BATCH: int = 64
+    RERANK_MEMO_SIZE: int = 20000
+    SPECULATIVE_RETRIEVAL: bool = False
+    INTENT_CLASSIFIER_ENABLED: bool = True
+    INTENT_MARGIN_THRESHOLD: float = 0.05
+    CHECKPOINT_PERSIST: bool = True  # False = keep checkpoints in process memory only
+    CHECKPOINT_TTL: int = 86400  # 0 = never expire
+    CHECKPOINT_NS_TTL: Dict[str, int] = {}  # per-namespace override, root graph is ""
+    CHECKPOINT_KEEP_LAST: int = 20  # per thread, 0 = unlimited
+    CHECKPOINT_COMPACT_INTERVAL: int = 600  # seconds, 0 = no background compactor
+    REFLECTION_POOL_K: int = 20  # first-pass candidates; those past the first 10 are kept for reflection
+    REFLECTION_CONFIDENCE_MIN: float = 0.3  # below: the KB most likely lacks the answer, escalate directly
+    REFLECTION_CONFIDENCE_MAX: float = 0.8  # at or above (and sufficient): no reflection
+    REFLECTION_BUDGET_MS: int = 20000  # per request, 0 = unlimited
+    CONTEXT_TOKEN_BUDGET: int = 1500  # max tokens of retrieved context in an answer prompt
+    CONTEXT_TOKENIZER: str = "Qwen/Qwen2.5-7B-Instruct"  # tokenizer.json path or HF repo already in the local cache (never downloaded), matching the Ollama model's vocabulary
+    SINGLE_CALL_GENERATION: bool = False  # True = one generate+judge call instead of generate, then evaluate
+    LLM_MAX_IN_FLIGHT: int = 2  # concurrent calls per model, match OLLAMA_NUM_PARALLEL
+    LLM_RESERVED_SLOTS: int = 1  # of those, kept free for the top-priority lane
+    LLM_LANE_PRIORITY: Dict[str, int] = {"intent": 0, "evaluate": 1, "generate_judge": 2, "generate": 2}  # lower runs first
+    LLM_QUEUE_TIMEOUT: float = 10.0  # max seconds a call may wait for a slot
+    REQUEST_DEADLINE: float = 60.0  # seconds per request, bounds every queue wait; 0 = none
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,162 @@
+# app/llm/context.py
+#
+# Token-budgeted context packing for the answer prompts.
+#
+# Passages are packed in rerank order, each with a share of the budget
+# proportional to its rerank score (whatever a short passage leaves unused
+# flows on to the next). A passage that doesn't fit its share is trimmed to
+# its sentences sharing the most (IDF-weighted) terms with the query, kept in
+# their original order. Sentences are scored lexically: the serving path has
+# no sentence vectors (the index holds chunk vectors), and embedding them per
+# request would put an embedding batch per chunk before every LLM call.
+
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+from app.config import settings
+from app.vectorstore.reranker import chunk_id
+
+# SemanticChunker's default sentence split
+SENTENCE_SPLIT = re.compile(r"(?<=[.?!])\s+")
+WORD = re.compile(r"\w+")
+PASSAGE_SEPARATOR = "\n\n"
+GAP = " ... "
+MIN_PASSAGE_TOKENS = 16  # don't bother adding a passage with less room than this
+CHARS_PER_TOKEN = 4  # rough estimate, only used when the tokenizer can't be loaded
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+def _load_tokenizer():
+    """
+    CONTEXT_TOKENIZER as a tokenizer.json path or a Hub repo already in the
+    local HF cache. Never downloads: a miss fails at once instead of retrying
+    the Hub inside a request (fetch it beforehand with
+    `huggingface-cli download <repo> tokenizer.json`).
+    """
+    from tokenizers import Tokenizer
+    name = settings.CONTEXT_TOKENIZER
+    if os.path.isfile(name):
+        return Tokenizer.from_file(name)
+    from huggingface_hub import hf_hub_download
+    return Tokenizer.from_file(hf_hub_download(name, "tokenizer.json", local_files_only=True))
+
+def load_tokenizer():
+    """Load the tokenizer now (app startup) rather than on the first request."""
+    _get_tokenizer()
+
+def _get_tokenizer():
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                try:
+                    _tokenizer = _load_tokenizer()
+                except Exception as e:
+                    print(f"⚠️  Tokenizer {settings.CONTEXT_TOKENIZER} unavailable ({e}), estimating {CHARS_PER_TOKEN} chars per token")
+                    _tokenizer = None
+                _tokenizer_loaded = True
+    return _tokenizer
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` for the answer model (estimated when its tokenizer isn't available)."""
+    if not text:
+        return 0
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` with at most `max_tokens` tokens."""
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    encoding = tokenizer.encode(text, add_special_tokens=False)
+    if len(encoding.ids) <= max_tokens:
+        return text
+    return text[:encoding.offsets[max_tokens - 1][1]]
+
+
+def _terms(text: str) -> set:
+    return set(WORD.findall(text.lower()))
+
+def _sentence_scores(sentences: List[str], query: str) -> np.ndarray:
+    """
+    Query-term overlap of each sentence, each term weighted by its IDF over
+    the passage's sentences. No overlap scores 0, so lead order is kept.
+    """
+    query_terms = _terms(query)
+    sentence_terms = [_terms(s) & query_terms for s in sentences]
+    df = Counter(t for terms in sentence_terms for t in terms)
+    idf = {t: math.log(1 + len(sentences) / n) for t, n in df.items()}
+    return np.array([sum(idf[t] for t in terms) for terms in sentence_terms], dtype=np.float32)
+
+def extract_sentences(text: str, max_tokens: int, query: str = "") -> Tuple[str, int]:
+    """
+    Trim `text` to its highest-scoring sentences within `max_tokens`, in
+    document order, gaps marked with " ... ". Returns (text, tokens).
+    """
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+    scores = _sentence_scores(sentences, query) if len(sentences) > 1 else np.zeros(1)
+    gap_tokens = count_tokens(GAP)
+
+    chosen, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        cost = count_tokens(sentences[i]) + (gap_tokens if chosen else 0)
+        if used + cost <= max_tokens:
+            chosen.append(int(i))
+            used += cost
+    if not chosen:
+        # Even the best sentence is too long: keep as much of it as fits
+        best = sentences[int(np.argmax(scores))]
+        trimmed = truncate_tokens(best, max_tokens)
+        return trimmed, count_tokens(trimmed)
+
+    chosen.sort()
+    parts = [sentences[chosen[0]]]
+    for prev, cur in zip(chosen, chosen[1:]):
+        parts.append((" " if cur == prev + 1 else GAP) + sentences[cur])
+    packed = "".join(parts)
+    return packed, count_tokens(packed)
+
+def pack_context(query: str, docs, budget: Optional[int] = None) -> Tuple[str, List[str], int]:
+    """
+    Context of at most `budget` tokens (default CONTEXT_TOKEN_BUDGET) built
+    from reranked `docs`, each passage preceded by "[source: <chunk id>]".
+    Returns (context, source ids included, tokens used).
+    """
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    weights = [max(float(doc.metadata.get("relevance_score") or 0.0), 1e-3) for doc in docs]
+    separator_tokens = count_tokens(PASSAGE_SEPARATOR)
+
+    blocks, sources, used = [], [], 0
+    for i, doc in enumerate(docs):
+        source = chunk_id(doc)
+        header = f"[source: {source}]\n"
+        overhead = count_tokens(header) + (separator_tokens if blocks else 0)
+        remaining = budget - used
+        share = int(remaining * weights[i] / sum(weights[i:])) - overhead
+        if share < MIN_PASSAGE_TOKENS:
+            share = remaining - overhead  # a low score alone shouldn't drop a passage that still fits
+        if share < MIN_PASSAGE_TOKENS:
+            break
+
+        text = doc.page_content.strip()
+        tokens = count_tokens(text)
+        if tokens > share:
+            text, tokens = extract_sentences(text, share, query)
+        if not text:
+            continue
+
+        blocks.append(header + text)
+        sources.append(source)
+        used += overhead + tokens
+
+    return PASSAGE_SEPARATOR.join(blocks), sources, used
@@ -0,0 +1,261 @@
+# app/llm/gateway.py
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from langchain_core.runnables import Runnable
+from app.config import settings
+from app.utils.metrics import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_REJECTED
+
+# Absolute time.monotonic() deadline of the current request (set by the router)
+_request_deadline = contextvars.ContextVar("helpdesk_request_deadline", default=None)
+
+SERVICE_EWMA_ALPHA = 0.2
+
+
+class LLMOverloaded(Exception):
+    """Raised instead of queueing a call that can't get a slot before its deadline."""
+
+    def __init__(self, model: str, lane: str, retry_after: float):
+        self.model = model
+        self.lane = lane
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"LLM '{model}' overloaded ({lane} lane), retry after {self.retry_after}s")
+
+
+def set_request_deadline(seconds: Optional[float] = None):
+    """Bound every LLM queue wait of the current request (context-local). Returns a reset token."""
+    seconds = settings.REQUEST_DEADLINE if seconds is None else seconds
+    return _request_deadline.set(time.monotonic() + seconds if seconds else None)
+
+def reset_request_deadline(token):
+    _request_deadline.reset(token)
+
+
+class _Waiter:
+    """A queued call; async when created with its event loop, else wakes a blocked thread."""
+    __slots__ = ("lane", "priority", "granted", "cancelled", "event", "future", "loop")
+
+    def __init__(self, lane: str, priority: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.lane = lane
+        self.priority = priority
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+
+    def notify(self):
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        else:
+            self.event.set()
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class LLMGateway:
+    """
+    Admission control in front of one model.
+
+    At most `max_in_flight` calls run at once; waiting calls are served by
+    lane priority (then arrival), and `reserved` slots are only used by the
+    top-priority lane, so a short intent call never queues behind long
+    generations. A call whose expected wait (per-lane service time EWMA of
+    everything ahead of it) already exceeds its deadline is rejected up
+    front with LLMOverloaded, as is one still queued when the deadline hits.
+    Thread-safe; sync callers block a thread, async callers await.
+    """
+
+    def __init__(self, model: str, max_in_flight: Optional[int] = None, reserved: Optional[int] = None,
+                 priorities: Optional[Dict[str, int]] = None, queue_timeout: Optional[float] = None):
+        self.model = model
+        self.max_in_flight = max(1, max_in_flight or settings.LLM_MAX_IN_FLIGHT)
+        reserved = settings.LLM_RESERVED_SLOTS if reserved is None else reserved
+        self.reserved = min(max(0, reserved), self.max_in_flight - 1)
+        self.priorities = priorities or settings.LLM_LANE_PRIORITY
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.top_priority = min(self.priorities.values(), default=0)
+
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._service = {}  # lane -> EWMA seconds a call holds its slot
+
+    # -----------------------------
+    # Scheduling (callers hold self._lock)
+    # -----------------------------
+    def _priority(self, lane: str) -> int:
+        return self.priorities.get(lane, max(self.priorities.values(), default=0))
+
+    def _slots_for(self, priority: int) -> int:
+        return self.max_in_flight if priority <= self.top_priority else self.max_in_flight - self.reserved
+
+    def _can_run(self, priority: int) -> bool:
+        return self._in_flight < self._slots_for(priority)
+
+    def _service_time(self, lane: str) -> float:
+        if lane in self._service:
+            return self._service[lane]
+        return sum(self._service.values()) / len(self._service) if self._service else 0.0
+
+    def _expected_wait(self, lane: str, priority: int) -> float:
+        """Work ahead of a new `lane` call (queued at same or higher priority, half of what's running) per usable slot."""
+        ahead = sum(self._service_time(w.lane) for _, _, w in self._heap if not w.cancelled and w.priority <= priority)
+        running = self._in_flight * self._service_time(lane) / 2
+        return (ahead + running) / self._slots_for(priority)
+
+    def _dispatch(self):
+        while self._heap:
+            priority, _, waiter = self._heap[0]
+            if waiter.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if not self._can_run(priority):
+                break
+            heapq.heappop(self._heap)
+            waiter.granted = True
+            self._in_flight += 1
+            LLM_QUEUE_DEPTH.labels(model=self.model, lane=waiter.lane).dec()
+            waiter.notify()
+        LLM_IN_FLIGHT.labels(model=self.model).set(self._in_flight)
+
+    def _timeout(self) -> float:
+        timeout = self.queue_timeout
+        deadline = _request_deadline.get()
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        return timeout
+
+    def _enqueue(self, lane: str, timeout: float, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """None when a slot was granted right away, else the queued waiter (ready to be notified)."""
+        priority = self._priority(lane)
+        with self._lock:
+            ahead = any(not w.cancelled and w.priority <= priority for _, _, w in self._heap)
+            if not ahead and self._can_run(priority):
+                self._in_flight += 1
+                LLM_IN_FLIGHT.labels(model=self.model).set(self._in_flight)
+                return None
+
+            expected = self._expected_wait(lane, priority)
+            if timeout <= 0 or expected > timeout:
+                LLM_REJECTED.labels(model=self.model, lane=lane, reason="predicted").inc()
+                raise LLMOverloaded(self.model, lane, expected)
+
+            waiter = _Waiter(lane, priority, loop)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+            LLM_QUEUE_DEPTH.labels(model=self.model, lane=lane).inc()
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Give up waiting. True if the slot was granted meanwhile (caller now owns it)."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            LLM_QUEUE_DEPTH.labels(model=self.model, lane=waiter.lane).dec()
+            return False
+
+    def _reject_timeout(self, lane: str):
+        with self._lock:
+            expected = self._expected_wait(lane, self._priority(lane))
+        LLM_REJECTED.labels(model=self.model, lane=lane, reason="timeout").inc()
+        raise LLMOverloaded(self.model, lane, expected)
+
+    def _release(self, lane: str, held: Optional[float] = None):
+        with self._lock:
+            self._in_flight -= 1
+            if held is not None:
+                previous = self._service.get(lane)
+                self._service[lane] = held if previous is None else (1 - SERVICE_EWMA_ALPHA) * previous + SERVICE_EWMA_ALPHA * held
+            self._dispatch()
+
+    # -----------------------------
+    # Slots
+    # -----------------------------
+    @contextmanager
+    def slot(self, lane: str):
+        start = time.monotonic()
+        timeout = self._timeout()
+        waiter = self._enqueue(lane, timeout)
+        if waiter is not None:
+            if not waiter.event.wait(timeout) and not self._abandon(waiter):
+                self._reject_timeout(lane)
+        granted = time.monotonic()
+        LLM_QUEUE_WAIT.labels(model=self.model, lane=lane).observe(granted - start)
+        try:
+            yield
+        finally:
+            self._release(lane, time.monotonic() - granted)
+
+    @asynccontextmanager
+    async def aslot(self, lane: str):
+        start = time.monotonic()
+        timeout = self._timeout()
+        waiter = self._enqueue(lane, timeout, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter.future, timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    self._reject_timeout(lane)
+            except BaseException:
+                # Request cancelled while queued: hand back a slot granted meanwhile
+                if self._abandon(waiter):
+                    self._release(lane)
+                raise
+        granted = time.monotonic()
+        LLM_QUEUE_WAIT.labels(model=self.model, lane=lane).observe(granted - start)
+        try:
+            yield
+        finally:
+            self._release(lane, time.monotonic() - granted)
+
+    def wrap(self, runnable: Runnable, lane: str) -> "GatedRunnable":
+        return GatedRunnable(runnable, self, lane)
+
+
+class GatedRunnable(Runnable):
+    """A runnable (LLM, structured-output chain) whose every call holds a gateway slot."""
+
+    def __init__(self, bound: Runnable, gateway: LLMGateway, lane: str):
+        self.bound = bound
+        self.gateway = gateway
+        self.lane = lane
+
+    def invoke(self, input, config=None, **kwargs):
+        with self.gateway.slot(self.lane):
+            return self.bound.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        async with self.gateway.aslot(self.lane):
+            return await self.bound.ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        with self.gateway.slot(self.lane):
+            yield from self.bound.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        async with self.gateway.aslot(self.lane):
+            async for chunk in self.bound.astream(input, config, **kwargs):
+                yield chunk
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+def get_gateway(model: str) -> LLMGateway:
+    """One gateway per model name, shared by every runnable calling it."""
+    with _gateways_lock:
+        if model not in _gateways:
+            _gateways[model] = LLMGateway(model)
+        return _gateways[model]
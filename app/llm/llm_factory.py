@@ -1,17 +1,37 @@
 from langchain_ollama import ChatOllama
 from app.original.langraph_pipeline_typed_original import Intentclassify
-from app.original.langraph_pipeline_typed_original import EvaluationResult,AnswerGeneration
+from app.original.langraph_pipeline_typed_original import EvaluationResult,AnswerGeneration,GroundedAnswer
 from langchain.output_parsers import PydanticOutputParser
+from app.utils.metrics import LLMMetricsCallback
+from app.llm.gateway import get_gateway
 
 # Base LLM
 llm = ChatOllama(model="qwen:latest", temperature=0)
 
+# Each purpose reports count/latency/tokens to helpdesk_llm_* under its own label
+def _with_metrics(runnable, purpose: str):
+    return runnable.with_config(callbacks=[LLMMetricsCallback(purpose)])
+
+# Admission control: every call waits for a slot on the model's gateway in the
+# lane named after its purpose, and may be shed with LLMOverloaded
+def _gated(runnable, purpose: str):
+    return get_gateway(llm.model).wrap(runnable, purpose)
+
+def _instrument_and_gate(runnable, purpose: str):
+    return _gated(_with_metrics(runnable, purpose), purpose)
+
 # Intent classification LLM
-intent_llm = llm.with_structured_output(Intentclassify)
+intent_llm = _instrument_and_gate(llm.with_structured_output(Intentclassify), "intent")
 
 # Evaluation LLM
-evaluation_llm = llm.with_structured_output(EvaluationResult)
-AnswerGeneration_llm = llm.with_structured_output(AnswerGeneration)
+evaluation_llm = _instrument_and_gate(llm.with_structured_output(EvaluationResult), "evaluate")
+AnswerGeneration_llm = _instrument_and_gate(llm.with_structured_output(AnswerGeneration), "generate")
+
+# Single-call mode: answer + self-assessment + citations in one structured call
+grounded_answer_llm = _instrument_and_gate(llm.with_structured_output(GroundedAnswer), "generate_judge")
+
+# Plain-text answer LLM for token streaming (no structured output to wait for)
+streaming_answer_llm = _instrument_and_gate(llm, "generate")
 # Optional: helper functions to get LLMs
 def get_intent_llm():
     return intent_llm
@@ -24,4 +44,10 @@ def get_llm():
     return llm
 
 def get_answer_generation_llm():
-    return AnswerGeneration_llm    
+    return AnswerGeneration_llm
+
+def get_streaming_answer_llm():
+    return streaming_answer_llm
+
+def get_grounded_answer_llm():
+    return grounded_answer_llm    
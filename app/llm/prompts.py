@@ -26,4 +26,34 @@ Question:
 
 Return ONLY a JSON object with field {{answer}}.
 
-"""
\ No newline at end of file
+"""
+# Streaming variant: plain text, so tokens can be forwarded as they are generated
+STREAM_RAG_PROMPT = """You are a strict RAG assistant. Only answer based on the given context.
+Do not use any external knowledge or make assumptions.
+
+Context:
+{context}
+
+Question:
+{question}
+
+Answer in plain text, without any preamble.
+"""
+
+# Single-call mode: generation and self-assessment in one structured response
+GROUNDED_RAG_PROMPT = """You are a strict RAG assistant. Only answer based on the given context.
+Do not use any external knowledge or make assumptions.
+
+Context (each passage is preceded by its source id):
+{context}
+
+Question:
+{question}
+
+Return ONLY a JSON object with fields:
+- answer: the answer, using only the context
+- confidence: 0.0 to 1.0, how well the context supports the answer
+- sufficient: true only if the context fully answers the question
+- reason: short explanation
+- cited_chunks: the source ids of the passages the answer uses
+"""
@@ -33,6 +33,14 @@ async def startup_event():
     
     # Import and initialize workflow here to load models at startup
     from app.pipeline.graph import workflow
+    from app.memory.redis_checkpoint import checkpointer
+
+    # Prune orphaned checkpoint writes in the background
+    checkpointer.start_compactor()
+
+    # Load the context-packing tokenizer (local files only) now rather than on the first request
+    from app.llm.context import load_tokenizer
+    load_tokenizer()
     
     # Optionally run a dummy invocation to ensure everything is loaded
     # This will trigger model loading once at startup
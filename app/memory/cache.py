@@ -1,28 +1,119 @@
+import json
 import hashlib
-import pickle
-import redis
+from app.utils.metrics import CACHE_LOOKUPS
 from app.config import settings
+from app.memory.redis_pool import get_redis, get_async_redis
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+redis_client = get_redis()
+
+def _count_lookup(cache: str, val, decoded):
+    result = "hit" if decoded else ("stale" if val else "miss")
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+    return decoded
 
 # ✅ CACHE KEY NOW DEPENDS ONLY ON QUERY (NO INTENT)
 def _key(query: str):
     h = hashlib.sha256(query.encode()).hexdigest()[:16]
     return f"helpdesk:cache:{h}"
 
-# ✅ UPDATED SIGNATURE (NO INTENT)
-def get_cached(query: str):
-    val = redis_client.get(_key(query))
+# Retrieval cache entries hold (docstore id, rerank score) pairs plus the index
+# version they were computed against; documents are rehydrated from the local
+# docstore by the caller. A few hundred bytes of JSON per query, no pickle.
+def _encode_refs(docs, index_version: str):
+    refs = [[doc.id, doc.metadata.get("relevance_score")] for doc in docs]
+    if any(doc_id is None for doc_id, _ in refs):
+        return None  # chunks without a docstore id can't be rehydrated
+    return json.dumps({"v": index_version, "docs": refs})
+
+def _decode_refs(val, index_version: str):
     if not val:
         return None
     try:
-        return pickle.loads(val)
+        entry = json.loads(val)
     except Exception:
         return None
+    if entry.get("v") != index_version:
+        return None  # index was rebuilt since this entry was written
+    return [(doc_id, score) for doc_id, score in entry["docs"]]
 
 # ✅ UPDATED SIGNATURE (NO INTENT)
-def set_cached(query: str, value, ttl: int = 3600):
+def get_cached(query: str, index_version: str):
+    """[(docstore id, rerank score)] cached for `query`, or None."""
     try:
-        redis_client.set(_key(query), pickle.dumps(value), ex=ttl)
+        val = redis_client.get(_key(query))
+    except Exception as e:
+        print("Cache get failed", e)
+        return _count_lookup("retrieval", None, None)
+    return _count_lookup("retrieval", val, _decode_refs(val, index_version))
+
+# ✅ UPDATED SIGNATURE (NO INTENT)
+def set_cached(query: str, docs, index_version: str, ttl: int = 3600):
+    entry = _encode_refs(docs, index_version)
+    if entry is None:
+        return
+    try:
+        redis_client.set(_key(query), entry, ex=ttl)
     except Exception as e:
         print("Cache set failed", e)
+
+async def aget_cached(query: str, index_version: str):
+    try:
+        val = await get_async_redis().get(_key(query))
+    except Exception as e:
+        print("Cache get failed", e)
+        return _count_lookup("retrieval", None, None)
+    return _count_lookup("retrieval", val, _decode_refs(val, index_version))
+
+async def aset_cached(query: str, docs, index_version: str, ttl: int = 3600):
+    entry = _encode_refs(docs, index_version)
+    if entry is None:
+        return
+    try:
+        await get_async_redis().set(_key(query), entry, ex=ttl)
+    except Exception as e:
+        print("Cache set failed", e)
+
+# -----------------------------
+# Full pipeline result cache
+# -----------------------------
+def _result_key(query: str, index_version: str):
+    # Keyed by index version: answers computed against the old index die with a re-ingest
+    normalized = " ".join(query.lower().split())
+    h = hashlib.sha256(f"{index_version}:{normalized}".encode()).hexdigest()[:16]
+    return f"helpdesk:result:{h}"
+
+def _decode_result(val):
+    if not val:
+        return None
+    try:
+        return json.loads(val)
+    except Exception:
+        return None
+
+def get_cached_result(query: str, index_version: str):
+    try:
+        val = redis_client.get(_result_key(query, index_version))
+    except Exception as e:
+        print("Result cache get failed", e)
+        return _count_lookup("result", None, None)
+    return _count_lookup("result", val, _decode_result(val))
+
+def set_cached_result(query: str, value: dict, index_version: str, ttl: int = settings.CACHE_TTL):
+    try:
+        redis_client.set(_result_key(query, index_version), json.dumps(value), ex=ttl)
+    except Exception as e:
+        print("Result cache set failed", e)
+
+async def aget_cached_result(query: str, index_version: str):
+    try:
+        val = await get_async_redis().get(_result_key(query, index_version))
+    except Exception as e:
+        print("Result cache get failed", e)
+        return _count_lookup("result", None, None)
+    return _count_lookup("result", val, _decode_result(val))
+
+async def aset_cached_result(query: str, value: dict, index_version: str, ttl: int = settings.CACHE_TTL):
+    try:
+        await get_async_redis().set(_result_key(query, index_version), json.dumps(value), ex=ttl)
+    except Exception as e:
+        print("Result cache set failed", e)
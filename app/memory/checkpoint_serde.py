@@ -0,0 +1,102 @@
+# app/memory/checkpoint_serde.py
+#
+# Compact checkpoint encoding: LangGraph's msgpack serializer + zstd, with
+# LangChain Documents replaced by chunk-id references that are resolved back
+# from the vectorstore docstore on read.
+
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.documents import Document
+
+try:
+    import zstandard
+    _compressor = zstandard.ZstdCompressor(level=3)
+    _decompressor = zstandard.ZstdDecompressor()
+except ImportError:  # optional: fall back to uncompressed msgpack
+    zstandard = None
+
+EMPTY = b"empty"  # channel bumped to a new version but holding no value
+DOC_REF = "__doc_ref__"
+# Metadata added after retrieval (by the reranker) that the docstore doesn't know
+DOC_REF_EXTRA_METADATA = ("relevance_score",)
+
+
+def dumps(serde, obj: Any) -> bytes:
+    """`{type}|{codec}|{data}` where codec is z (zstd) or - (raw)."""
+    type_, data = serde.dumps_typed(obj)
+    if zstandard is not None:
+        return f"{type_}|z|".encode() + _compressor.compress(data)
+    return f"{type_}|-|".encode() + data
+
+def loads(serde, blob: bytes) -> Any:
+    type_, codec, data = blob.split(b"|", 2)
+    if codec == b"z":
+        data = _decompressor.decompress(data)
+    return serde.loads_typed((type_.decode(), data))
+
+
+def encode_docs(obj: Any) -> Any:
+    """Replace Documents that have a docstore id with a small reference dict."""
+    if isinstance(obj, Document):
+        if not obj.id:
+            return obj
+        ref = {DOC_REF: obj.id}
+        extra = {k: obj.metadata[k] for k in DOC_REF_EXTRA_METADATA if k in obj.metadata}
+        if extra:
+            ref["metadata"] = extra
+        return ref
+    if isinstance(obj, list):
+        return [encode_docs(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(encode_docs(v) for v in obj)
+    if isinstance(obj, dict):
+        return {k: encode_docs(v) for k, v in obj.items()}
+    return obj
+
+def _is_ref(obj: Any) -> bool:
+    return isinstance(obj, dict) and DOC_REF in obj
+
+def collect_doc_refs(obj: Any, out: Optional[set] = None) -> set:
+    out = set() if out is None else out
+    if _is_ref(obj):
+        out.add(obj[DOC_REF])
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            collect_doc_refs(v, out)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            collect_doc_refs(v, out)
+    return out
+
+def restore_docs(obj: Any, resolved: Dict[str, Document]) -> Any:
+    if _is_ref(obj):
+        doc = resolved.get(obj[DOC_REF])
+        if doc is None:
+            # Chunk no longer in the index (re-ingested); keep the id visible
+            return Document(id=obj[DOC_REF], page_content="", metadata=dict(obj.get("metadata", {})))
+        return Document(
+            id=obj[DOC_REF],
+            page_content=doc.page_content,
+            metadata={**doc.metadata, **obj.get("metadata", {})},
+        )
+    if isinstance(obj, list):
+        return [restore_docs(v, resolved) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(restore_docs(v, resolved) for v in obj)
+    if isinstance(obj, dict):
+        return {k: restore_docs(v, resolved) for k, v in obj.items()}
+    return obj
+
+def resolve_doc_refs(objs: List[Any], resolver: Optional[Callable[[List[str]], Dict[str, Document]]]) -> List[Any]:
+    """Resolve every document reference in `objs` with one bulk docstore lookup."""
+    refs = set()
+    for obj in objs:
+        collect_doc_refs(obj, refs)
+    if not refs:
+        return objs
+    resolved = {}
+    if resolver is not None:
+        try:
+            resolved = resolver(sorted(refs))
+        except Exception as e:
+            print(f"Error resolving checkpoint documents: {e}")
+    return [restore_docs(obj, resolved) for obj in objs]
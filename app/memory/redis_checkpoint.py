@@ -1,30 +1,152 @@
-import pickle
-import redis
-from typing import Optional, Any, Iterator, Tuple, Sequence
-from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple
+import threading
+import time
+from typing import Optional, Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple, Sequence
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple, WRITES_IDX_MAP
 from app.config import settings
+from app.memory.redis_pool import get_redis, get_async_redis
+from app.memory import checkpoint_serde as cs
+from app.utils.executor import run_blocking
+from app.utils.metrics import CHECKPOINT_COMPACTED, CHECKPOINT_RTT
 
 
 class RedisSaver(BaseCheckpointSaver):
     """
     Redis-based checkpoint saver for LangGraph.
     Implements the full BaseCheckpointSaver interface.
+
+    Layout (no keyspace scans):
+      {prefix}{ns}:{thread}:{checkpoint_id}               -> checkpoint without channel values
+      {prefix}blob:{ns}:{thread}:{channel}:{version}      -> one channel value
+      {prefix}index:{ns}:{thread}                          -> ZSET of checkpoint ids, scored by write time
+      {prefix}writes:{ns}:{thread}:{checkpoint_id}         -> HASH "{task_id}:{idx}" -> write
+    A put only writes the blobs of channels listed in `new_versions`, so an
+    unchanged channel (the retrieved docs, the answer) is stored once per
+    thread instead of once per super-step. Values are msgpack (+ zstd when
+    installed) and Documents are stored as docstore ids, resolved back through
+    `doc_resolver` on read.
+
+    Every put / put_writes / list is a single pipeline round trip; a get adds
+    one MGET for the channel blobs (and a ZREVRANGE for the latest checkpoint).
+    The async methods run the same pipelines on a redis.asyncio client; both
+    clients draw from the shared, size-bounded pools in app.memory.redis_pool.
+
+    Retention is enforced on write: every key gets the namespace's TTL
+    (refreshed while the thread is active) and a thread keeps only its newest
+    `keep_last` checkpoints. `compact()` (run periodically by
+    `start_compactor`) removes writes whose checkpoint is gone and prunes
+    expired ids from the thread indexes.
     """
 
-    def __init__(self, redis_url: Optional[str] = None, prefix: str = 'helpdesk:checkpoint:'):
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        prefix: str = 'helpdesk:checkpoint:',
+        doc_resolver: Optional[Callable[[List[str]], Dict[str, Any]]] = None,
+        ttl: Optional[int] = None,
+        ns_ttl: Optional[Dict[str, int]] = None,
+        keep_last: Optional[int] = None,
+    ):
         super().__init__()
         self.redis_url = redis_url or settings.REDIS_URL
         self.prefix = prefix
-        self.client = redis.from_url(self.redis_url, decode_responses=False)
+        self.ttl = settings.CHECKPOINT_TTL if ttl is None else ttl
+        self.ns_ttl = settings.CHECKPOINT_NS_TTL if ns_ttl is None else ns_ttl
+        self.keep_last = settings.CHECKPOINT_KEEP_LAST if keep_last is None else keep_last
+        self._compactor = None
+        self.client = get_redis(self.redis_url)
+        self.aclient = get_async_redis(self.redis_url)
+        # ids -> {id: Document}; set by the graph module (avoids importing the vectorstore here)
+        self.doc_resolver = doc_resolver
 
     def _make_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
         return f"{self.prefix}{checkpoint_ns}:{thread_id}:{checkpoint_id}"
 
-    def _make_version_key(self, thread_id: str, checkpoint_ns: str) -> str:
-        return f"{self.prefix}version:{checkpoint_ns}:{thread_id}"
-    
-    def _make_writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, task_id: str) -> str:
-        return f"{self.prefix}writes:{checkpoint_ns}:{thread_id}:{checkpoint_id}:{task_id}"
+    def _make_index_key(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self.prefix}index:{checkpoint_ns}:{thread_id}"
+
+    def _make_writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.prefix}writes:{checkpoint_ns}:{thread_id}:{checkpoint_id}"
+
+    def _make_blob_key(self, thread_id: str, checkpoint_ns: str, channel: str, version) -> str:
+        return f"{self.prefix}blob:{checkpoint_ns}:{thread_id}:{channel}:{version}"
+
+    def _ttl_for(self, checkpoint_ns: str) -> Optional[int]:
+        # Subgraph namespaces look like "node:task_id"; match on the node name
+        ttl = self.ns_ttl.get(checkpoint_ns, self.ns_ttl.get(checkpoint_ns.split(":")[0], self.ttl))
+        return ttl or None
+
+    @staticmethod
+    def _config_parts(config: dict) -> Tuple[str, str, Optional[str]]:
+        configurable = config["configurable"]
+        return (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", "default"),
+            configurable.get("checkpoint_id"),
+        )
+
+    @staticmethod
+    def _checkpoint_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> dict:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def _queue_put(self, pipe, config: dict, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: dict) -> dict:
+        """
+        Queue the payload SET, changed channel blobs and index ZADD on `pipe`;
+        returns the new checkpoint's config. With keep_last set, the last two
+        queued commands read the ids to evict and the oldest id that is kept.
+        """
+        thread_id, checkpoint_ns, parent_id = self._config_parts(config)
+        checkpoint_id = checkpoint["id"]
+        ttl = self._ttl_for(checkpoint_ns)
+
+        values = checkpoint.get("channel_values", {})
+        for channel, version in new_versions.items():
+            blob = cs.dumps(self.serde, cs.encode_docs(values[channel])) if channel in values else cs.EMPTY
+            pipe.set(self._make_blob_key(thread_id, checkpoint_ns, channel, version), blob, ex=ttl)
+        if ttl:
+            # Unchanged channels are shared with earlier checkpoints; keep them alive with this one
+            for channel, version in checkpoint.get("channel_versions", {}).items():
+                if channel not in new_versions:
+                    pipe.expire(self._make_blob_key(thread_id, checkpoint_ns, channel, version), ttl)
+
+        payload = {
+            "checkpoint": {k: v for k, v in checkpoint.items() if k != "channel_values"},
+            "metadata": metadata,
+            "parent_checkpoint_id": parent_id,
+        }
+
+        index_key = self._make_index_key(thread_id, checkpoint_ns)
+        pipe.set(self._make_key(thread_id, checkpoint_ns, checkpoint_id), cs.dumps(self.serde, payload), ex=ttl)
+        pipe.zadd(index_key, {checkpoint_id: time.time()})
+        if ttl:
+            pipe.expire(index_key, ttl)
+        if self.keep_last:
+            pipe.zrange(index_key, 0, -(self.keep_last + 1))
+            pipe.zrange(index_key, -self.keep_last, -self.keep_last)
+        return self._checkpoint_config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def _queue_writes(self, pipe, config: dict, writes: Sequence[Tuple[str, Any]], task_id: str) -> bool:
+        thread_id, checkpoint_ns, checkpoint_id = self._config_parts(config)
+        checkpoint_id = checkpoint_id or "pending"
+
+        # Convert (channel, value) → (task_id, channel, value), one hash field per write
+        mapping = {
+            f"{task_id}:{WRITES_IDX_MAP.get(channel, idx)}": cs.dumps(self.serde, [task_id, channel, cs.encode_docs(value)])
+            for idx, (channel, value) in enumerate(writes)
+        }
+        if not mapping:
+            return False
+        writes_key = self._make_writes_key(thread_id, checkpoint_ns, checkpoint_id)
+        pipe.hset(writes_key, mapping=mapping)
+        ttl = self._ttl_for(checkpoint_ns)
+        if ttl:
+            pipe.expire(writes_key, ttl)
+        return True
 
     def put(
         self,
@@ -33,140 +155,382 @@ class RedisSaver(BaseCheckpointSaver):
         metadata: CheckpointMetadata,
         new_versions: dict,
     ) -> dict:
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_ns = config["configurable"].get("checkpoint_ns", "default")
-        checkpoint_id = checkpoint["id"]
+        pipe = self.client.pipeline(transaction=True)
+        next_config = self._queue_put(pipe, config, checkpoint, metadata, new_versions)
+        with CHECKPOINT_RTT.labels(op="put").time():
+            results = pipe.execute()
+        if self.keep_last and results[-2]:
+            self._trim(next_config, results[-2], results[-1])
+        return next_config
 
-        key = self._make_key(thread_id, checkpoint_ns, checkpoint_id)
+    def put_writes(self, config: dict, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        pipe = self.client.pipeline(transaction=True)
+        if self._queue_writes(pipe, config, writes, task_id):
+            with CHECKPOINT_RTT.labels(op="put_writes").time():
+                pipe.execute()
 
-        payload = {
-            "checkpoint": checkpoint,
-            "metadata": metadata,
-            "new_versions": new_versions,
-        }
+    # -----------------------------
+    # Retention
+    # -----------------------------
+    def _queue_trim_reads(self, pipe, thread_id: str, checkpoint_ns: str, evicted: list, kept: list):
+        for checkpoint_id in evicted + kept:
+            pipe.get(self._make_key(thread_id, checkpoint_ns, checkpoint_id))
 
-        self.client.set(key, pickle.dumps(payload))
+    def _queue_trim_deletes(self, pipe, thread_id: str, checkpoint_ns: str, evicted: list, kept: list, payloads: list):
+        """
+        Delete evicted checkpoints, their writes and the channel blobs no kept
+        checkpoint references. Channel versions only grow along a thread, so a
+        blob of an evicted checkpoint is still live only if the oldest kept
+        checkpoint points at the same version.
+        """
+        live = set()
+        if kept and payloads[-1]:
+            live = set(self._channel_blob_keys(thread_id, checkpoint_ns, payloads[-1]))
+        dead = set()
+        for payload in payloads[:len(evicted)]:
+            if payload:
+                dead.update(self._channel_blob_keys(thread_id, checkpoint_ns, payload))
 
-        # Update "latest" pointer
-        latest_key = self._make_key(thread_id, checkpoint_ns, "latest")
-        self.client.set(latest_key, checkpoint_id.encode())
+        keys = [self._make_key(thread_id, checkpoint_ns, cid) for cid in evicted]
+        keys += [self._make_writes_key(thread_id, checkpoint_ns, cid) for cid in evicted]
+        keys += sorted(dead - live)
+        pipe.delete(*keys)
+        pipe.zrem(self._make_index_key(thread_id, checkpoint_ns), *evicted)
 
-        return config
+    def _channel_blob_keys(self, thread_id: str, checkpoint_ns: str, payload: bytes) -> list:
+        try:
+            versions = cs.loads(self.serde, payload)["checkpoint"].get("channel_versions", {})
+        except Exception as e:
+            print(f"Error loading checkpoint for retention: {e}")
+            return []
+        return [self._make_blob_key(thread_id, checkpoint_ns, c, v) for c, v in versions.items()]
 
-    def put_writes(self, config: dict, writes: Sequence[Tuple[str, Any]], task_id: str) -> None:
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_ns = config["configurable"].get("checkpoint_ns", "default")
-        checkpoint_id = config["configurable"].get("checkpoint_id", "pending")
+    def _trim(self, config: dict, evicted: list, kept: list):
+        thread_id, checkpoint_ns, _ = self._config_parts(config)
+        evicted = [cid.decode() for cid in evicted]
+        kept = [cid.decode() for cid in kept]
+        try:
+            with CHECKPOINT_RTT.labels(op="trim").time():
+                pipe = self.client.pipeline(transaction=False)
+                self._queue_trim_reads(pipe, thread_id, checkpoint_ns, evicted, kept)
+                payloads = pipe.execute()
+                pipe = self.client.pipeline(transaction=True)
+                self._queue_trim_deletes(pipe, thread_id, checkpoint_ns, evicted, kept, payloads)
+                pipe.execute()
+        except Exception as e:
+            print(f"Checkpoint retention failed for thread {thread_id}: {e}")
 
-        writes_key = self._make_writes_key(thread_id, checkpoint_ns, checkpoint_id, task_id)
+    async def _atrim(self, config: dict, evicted: list, kept: list):
+        thread_id, checkpoint_ns, _ = self._config_parts(config)
+        evicted = [cid.decode() for cid in evicted]
+        kept = [cid.decode() for cid in kept]
+        try:
+            with CHECKPOINT_RTT.labels(op="trim").time():
+                pipe = self.aclient.pipeline(transaction=False)
+                self._queue_trim_reads(pipe, thread_id, checkpoint_ns, evicted, kept)
+                payloads = await pipe.execute()
+                pipe = self.aclient.pipeline(transaction=True)
+                self._queue_trim_deletes(pipe, thread_id, checkpoint_ns, evicted, kept, payloads)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Checkpoint retention failed for thread {thread_id}: {e}")
 
-        # Convert (channel, value) → (task_id, channel, value)
-        triple_writes = [(task_id, w[0], w[1]) for w in writes]
+    def _split_key(self, key: bytes, kind: str) -> Tuple[str, str, Optional[str]]:
+        """(thread_id, checkpoint_ns, checkpoint_id) from an index or writes key."""
+        rest = key.decode()[len(f"{self.prefix}{kind}:"):]
+        if kind == "index":
+            checkpoint_ns, thread_id = rest.rsplit(":", 1)
+            return thread_id, checkpoint_ns, None
+        checkpoint_ns, thread_id, checkpoint_id = rest.rsplit(":", 2)
+        return thread_id, checkpoint_ns, checkpoint_id
 
-        writes_data = {
-            "writes": triple_writes,
-            "task_id": task_id,
-        }
+    def compact(self, batch: int = 500) -> dict:
+        """
+        Remove writes hashes whose checkpoint no longer exists (evicted,
+        expired, or never committed) and drop expired ids from thread indexes.
+        Walks the keyspace with SCAN, so it belongs on a background thread.
+        """
+        stats = {"orphaned_writes": 0, "stale_index_entries": 0}
+
+        def _prune_writes(keys):
+            parts = [self._split_key(k, "writes") for k in keys]
+            pipe = self.client.pipeline(transaction=False)
+            for thread_id, checkpoint_ns, checkpoint_id in parts:
+                pipe.exists(self._make_key(thread_id, checkpoint_ns, checkpoint_id))
+            orphans = [k for k, exists in zip(keys, pipe.execute()) if not exists]
+            if orphans:
+                self.client.delete(*orphans)
+            stats["orphaned_writes"] += len(orphans)
+
+        keys = []
+        for key in self.client.scan_iter(match=f"{self.prefix}writes:*", count=batch):
+            keys.append(key)
+            if len(keys) >= batch:
+                _prune_writes(keys)
+                keys = []
+        if keys:
+            _prune_writes(keys)
+
+        for index_key in self.client.scan_iter(match=f"{self.prefix}index:*", count=batch):
+            thread_id, checkpoint_ns, _ = self._split_key(index_key, "index")
+            checkpoint_ids = [cid.decode() for cid in self.client.zrange(index_key, 0, -1)]
+            pipe = self.client.pipeline(transaction=False)
+            for checkpoint_id in checkpoint_ids:
+                pipe.exists(self._make_key(thread_id, checkpoint_ns, checkpoint_id))
+            stale = [cid for cid, exists in zip(checkpoint_ids, pipe.execute()) if not exists]
+            if stale:
+                self.client.zrem(index_key, *stale)
+            stats["stale_index_entries"] += len(stale)
+        return stats
+
+    def start_compactor(self, interval: Optional[int] = None):
+        """Run compact() every `interval` seconds on a daemon thread (idempotent)."""
+        interval = settings.CHECKPOINT_COMPACT_INTERVAL if interval is None else interval
+        if not interval or self._compactor is not None:
+            return
 
-        self.client.set(writes_key, pickle.dumps(writes_data))
+        def _loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    for kind, removed in self.compact().items():
+                        CHECKPOINT_COMPACTED.labels(kind=kind).inc(removed)
+                except Exception as e:
+                    print(f"Checkpoint compactor failed: {e}")
+
+        self._compactor = threading.Thread(target=_loop, name="helpdesk-checkpoint-compactor", daemon=True)
+        self._compactor.start()
 
+    # -----------------------------
+    # Decoding
+    # -----------------------------
+    def _decode_writes(self, raw: dict) -> list:
+        pending = []
+        for field in sorted(raw):
+            try:
+                pending.append(tuple(cs.loads(self.serde, raw[field])))
+            except Exception as e:
+                print(f"Error loading pending write {field}: {e}")
+        return pending
+
+    def _decode(self, fetched: list, filter: Optional[dict], limit: Optional[int]) -> list:
+        """(checkpoint_id, payload dict, pending writes) for fetched checkpoints matching `filter`."""
+        items = []
+        for checkpoint_id, payload, raw_writes in fetched:
+            if limit and len(items) >= limit:
+                break
+            if not payload:
+                continue
+            try:
+                data = cs.loads(self.serde, payload)
+            except Exception as e:
+                print(f"Error loading checkpoint {checkpoint_id}: {e}")
+                continue
+            metadata = data.get("metadata", {})
+            if filter and any(metadata.get(k) != v for k, v in filter.items()):
+                continue
+            items.append((checkpoint_id, data, self._decode_writes(raw_writes or {})))
+        return items
+
+    def _blob_keys(self, thread_id: str, checkpoint_ns: str, decoded: list) -> list:
+        keys = set()
+        for _, data, _ in decoded:
+            for channel, version in data["checkpoint"].get("channel_versions", {}).items():
+                keys.add(self._make_blob_key(thread_id, checkpoint_ns, channel, version))
+        return sorted(keys)
+
+    def _assemble(self, thread_id: str, checkpoint_ns: str, decoded: list, blobs: dict) -> list:
+        """Attach channel values to each decoded checkpoint; returns [(id, data, values, writes)]."""
+        values_cache = {}
+        items = []
+        for checkpoint_id, data, writes in decoded:
+            values = {}
+            for channel, version in data["checkpoint"].get("channel_versions", {}).items():
+                key = self._make_blob_key(thread_id, checkpoint_ns, channel, version)
+                blob = blobs.get(key)
+                if blob is None or blob == cs.EMPTY:
+                    continue
+                if key not in values_cache:
+                    try:
+                        values_cache[key] = cs.loads(self.serde, blob)
+                    except Exception as e:
+                        print(f"Error loading channel {channel} of checkpoint {checkpoint_id}: {e}")
+                        continue
+                values[channel] = values_cache[key]
+            items.append((checkpoint_id, data, values, writes))
+        return items
+
+    def _to_tuples(self, thread_id: str, checkpoint_ns: str, items: list, resolved: list) -> list:
+        tuples = []
+        for (checkpoint_id, data, _, _), (values, writes) in zip(items, resolved):
+            parent_id = data.get("parent_checkpoint_id")
+            tuples.append(CheckpointTuple(
+                config=self._checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+                checkpoint={**data["checkpoint"], "channel_values": values},
+                metadata=data.get("metadata", {}),
+                parent_config=self._checkpoint_config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+                pending_writes=writes,
+            ))
+        return tuples
+
+    # -----------------------------
+    # Fetching
+    # -----------------------------
+    def _queue_fetch(self, pipe, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str]):
+        for checkpoint_id in checkpoint_ids:
+            pipe.get(self._make_key(thread_id, checkpoint_ns, checkpoint_id))
+            pipe.hgetall(self._make_writes_key(thread_id, checkpoint_ns, checkpoint_id))
+
+    @staticmethod
+    def _split_fetch(checkpoint_ids: Sequence[str], results: list) -> list:
+        return [(checkpoint_ids[i], results[2 * i], results[2 * i + 1]) for i in range(len(checkpoint_ids))]
+
+    def _load(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str], filter: Optional[dict] = None, limit: Optional[int] = None) -> list:
+        """Checkpoint tuples for several ids: one pipeline for payloads + writes, one MGET for blobs."""
+        pipe = self.client.pipeline(transaction=False)
+        self._queue_fetch(pipe, thread_id, checkpoint_ns, checkpoint_ids)
+        with CHECKPOINT_RTT.labels(op="load").time():
+            fetched = pipe.execute()
+        decoded = self._decode(self._split_fetch(checkpoint_ids, fetched), filter, limit)
+        if not decoded:
+            return []
+
+        keys = self._blob_keys(thread_id, checkpoint_ns, decoded)
+        blobs = {}
+        if keys:
+            with CHECKPOINT_RTT.labels(op="blobs").time():
+                blobs = dict(zip(keys, self.client.mget(keys)))
+        items = self._assemble(thread_id, checkpoint_ns, decoded, blobs)
+        resolved = cs.resolve_doc_refs([(values, writes) for _, _, values, writes in items], self.doc_resolver)
+        return self._to_tuples(thread_id, checkpoint_ns, items, resolved)
+
+    async def _aload(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str], filter: Optional[dict] = None, limit: Optional[int] = None) -> list:
+        pipe = self.aclient.pipeline(transaction=False)
+        self._queue_fetch(pipe, thread_id, checkpoint_ns, checkpoint_ids)
+        with CHECKPOINT_RTT.labels(op="load").time():
+            fetched = await pipe.execute()
+        decoded = self._decode(self._split_fetch(checkpoint_ids, fetched), filter, limit)
+        if not decoded:
+            return []
+
+        keys = self._blob_keys(thread_id, checkpoint_ns, decoded)
+        blobs = {}
+        if keys:
+            with CHECKPOINT_RTT.labels(op="blobs").time():
+                blobs = dict(zip(keys, await self.aclient.mget(keys)))
+        items = self._assemble(thread_id, checkpoint_ns, decoded, blobs)
+        objs = [(values, writes) for _, _, values, writes in items]
+        # Docstore lookups are blocking SQLite / FAISS docstore reads
+        if cs.collect_doc_refs(objs):
+            objs = await run_blocking(cs.resolve_doc_refs, objs, self.doc_resolver)
+        return self._to_tuples(thread_id, checkpoint_ns, items, objs)
 
     def get_tuple(self, config: dict) -> Optional[CheckpointTuple]:
         """
         Returns a CheckpointTuple which LangGraph expects.
         CheckpointTuple is a NamedTuple with: (config, checkpoint, metadata, parent_config, pending_writes)
+        Without a checkpoint_id the latest checkpoint of the thread is returned.
         """
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_ns = config["configurable"].get("checkpoint_ns", "default")
-        checkpoint_id = config["configurable"].get("checkpoint_id")
+        thread_id, checkpoint_ns, checkpoint_id = self._config_parts(config)
 
         if not checkpoint_id:
-            return None 
-
-        key = self._make_key(thread_id, checkpoint_ns, checkpoint_id)
-        payload = self.client.get(key)
-
-        if not payload:
-            return None
-
-        try:
-            data = pickle.loads(payload)
-            
-            # Get any pending writes for this checkpoint
-            pending_writes = self._get_pending_writes(thread_id, checkpoint_ns, checkpoint_id)
-            
-            # Return a CheckpointTuple instead of a plain tuple
-            return CheckpointTuple(
-                config=config,
-                checkpoint=data["checkpoint"],
-                metadata=data.get("metadata", {}),
-                parent_config=None,  # Set this if you track parent checkpoints
-                pending_writes=pending_writes
-            )
-        except Exception as e:
-            print(f"Error loading checkpoint: {e}")
-            return None
+            with CHECKPOINT_RTT.labels(op="latest").time():
+                latest = self.client.zrevrange(self._make_index_key(thread_id, checkpoint_ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode()
 
-    def _get_pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
-        """Get all pending writes for a checkpoint."""
-        pattern = self._make_writes_key(thread_id, checkpoint_ns, checkpoint_id, "*")
-        pending = []
-        
-        for key in self.client.scan_iter(match=pattern):
-            writes_data_bytes = self.client.get(key)
-            if writes_data_bytes:
-                try:
-                    writes_data = pickle.loads(writes_data_bytes)
-                    pending.extend(writes_data.get("writes", []))
-                except Exception as e:
-                    print(f"Error loading pending writes from {key}: {e}")
-                    continue
-        
-        return pending
+        items = self._load(thread_id, checkpoint_ns, [checkpoint_id])
+        return items[0] if items else None
 
     def list(self, config: dict, *, filter: Optional[dict] = None, before: Optional[dict] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
         """
-        List checkpoints matching the given criteria.
+        List checkpoints matching the given criteria, newest first.
         Returns an iterator of CheckpointTuple objects.
         """
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_ns = config["configurable"].get("checkpoint_ns", "default")
+        thread_id, checkpoint_ns, _ = self._config_parts(config)
+        index_key = self._make_index_key(thread_id, checkpoint_ns)
 
-        pattern = f"{self.prefix}{checkpoint_ns}:{thread_id}:*"
-        count = 0
+        max_score = "+inf"
+        if before:
+            before_score = self.client.zscore(index_key, before["configurable"]["checkpoint_id"])
+            if before_score is None:
+                return
+            max_score = f"({before_score}"
 
-        for key in self.client.scan_iter(match=pattern):
-            if limit and count >= limit:
-                break
-                
-            key_str = key.decode() if isinstance(key, bytes) else key
-            if key_str.endswith(":latest") or ":version:" in key_str or ":writes:" in key_str:
-                continue
+        # Metadata filters are applied client side, so only bound the range without one
+        num = limit if limit and not filter else None
+        checkpoint_ids = [
+            cid.decode()
+            for cid in self.client.zrevrangebyscore(index_key, max_score, "-inf", start=0 if num else None, num=num)
+        ]
+        if not checkpoint_ids:
+            return
 
-            payload = self.client.get(key)
-            if payload:
-                try:
-                    data = pickle.loads(payload)
-                    
-                    # Extract checkpoint_id from key
-                    checkpoint_id = key_str.split(":")[-1]
-                    pending_writes = self._get_pending_writes(thread_id, checkpoint_ns, checkpoint_id)
-                    
-                    yield CheckpointTuple(
-                        config=config,
-                        checkpoint=data["checkpoint"],
-                        metadata=data.get("metadata", {}),
-                        parent_config=None,
-                        pending_writes=pending_writes
-                    )
-                    count += 1
-                except Exception as e:
-                    print(f"Error loading checkpoint from {key_str}: {e}")
-                    continue
+        yield from self._load(thread_id, checkpoint_ns, checkpoint_ids, filter, limit)
+
+    # -----------------------------
+    # Async interface (used by workflow.ainvoke)
+    # -----------------------------
+    async def aget_tuple(self, config: dict) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns, checkpoint_id = self._config_parts(config)
+
+        if not checkpoint_id:
+            with CHECKPOINT_RTT.labels(op="latest").time():
+                latest = await self.aclient.zrevrange(self._make_index_key(thread_id, checkpoint_ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode()
+
+        items = await self._aload(thread_id, checkpoint_ns, [checkpoint_id])
+        return items[0] if items else None
+
+    async def aput(
+        self,
+        config: dict,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: dict,
+    ) -> dict:
+        pipe = self.aclient.pipeline(transaction=True)
+        next_config = self._queue_put(pipe, config, checkpoint, metadata, new_versions)
+        with CHECKPOINT_RTT.labels(op="put").time():
+            results = await pipe.execute()
+        if self.keep_last and results[-2]:
+            await self._atrim(next_config, results[-2], results[-1])
+        return next_config
+
+    async def aput_writes(self, config: dict, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        pipe = self.aclient.pipeline(transaction=True)
+        if self._queue_writes(pipe, config, writes, task_id):
+            with CHECKPOINT_RTT.labels(op="put_writes").time():
+                await pipe.execute()
+
+    async def alist(self, config: dict, *, filter: Optional[dict] = None, before: Optional[dict] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        thread_id, checkpoint_ns, _ = self._config_parts(config)
+        index_key = self._make_index_key(thread_id, checkpoint_ns)
+
+        max_score = "+inf"
+        if before:
+            before_score = await self.aclient.zscore(index_key, before["configurable"]["checkpoint_id"])
+            if before_score is None:
+                return
+            max_score = f"({before_score}"
+
+        num = limit if limit and not filter else None
+        checkpoint_ids = [
+            cid.decode()
+            for cid in await self.aclient.zrevrangebyscore(index_key, max_score, "-inf", start=0 if num else None, num=num)
+        ]
+        if not checkpoint_ids:
+            return
+
+        for item in await self._aload(thread_id, checkpoint_ns, checkpoint_ids, filter, limit):
+            yield item
 
     def get_next_version(self, current: Optional[int], channel: str) -> int:
         return 1 if current is None else current + 1
 
 
 # Instantiate default checkpointer
-checkpointer = RedisSaver()
\ No newline at end of file
+checkpointer = RedisSaver()
@@ -0,0 +1,30 @@
+# app/memory/redis_pool.py
+
+import redis
+import redis.asyncio as aredis
+from typing import Optional
+from app.config import settings
+
+# One size-bounded pool per URL and flavour, shared by the caches and the checkpointer
+_sync_pools = {}
+_async_pools = {}
+
+def _pool_kwargs() -> dict:
+    return {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,  # wait for a free connection
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+    }
+
+def get_redis(url: Optional[str] = None) -> redis.Redis:
+    url = url or settings.REDIS_URL
+    if url not in _sync_pools:
+        _sync_pools[url] = redis.BlockingConnectionPool.from_url(url, **_pool_kwargs())
+    return redis.Redis(connection_pool=_sync_pools[url])
+
+def get_async_redis(url: Optional[str] = None) -> aredis.Redis:
+    url = url or settings.REDIS_URL
+    if url not in _async_pools:
+        _async_pools[url] = aredis.BlockingConnectionPool.from_url(url, **_pool_kwargs())
+    return aredis.Redis(connection_pool=_async_pools[url])
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+import uuid
+from typing import Optional
+
+import numpy as np
+from app.utils.metrics import SEMANTIC_CACHE_LOOKUPS
+from app.config import settings
+from app.memory.redis_pool import get_redis
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour answer cache keyed by query embedding.
+
+    Vectors are kept in an in-process NumPy matrix (cosine similarity on
+    normalized float32 rows) and mirrored to Redis so entries survive restarts
+    and are shared by workers: each lookup pulls the entries other workers
+    added since the last one from the Redis index (a ZSET scored by creation
+    time). Each entry expires after `ttl` seconds and the ZSET is trimmed to
+    the newest `max_entries` on every add, so the bound holds across workers.
+    Entries record the index version they were answered against and only
+    match lookups made against the same version.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        prefix: str = 'helpdesk:semcache:',
+        threshold: Optional[float] = None,
+        near_miss: Optional[float] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.prefix = prefix
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.near_miss = settings.SEMANTIC_CACHE_NEAR_MISS if near_miss is None else near_miss
+        self.ttl = ttl or settings.SEMANTIC_CACHE_TTL
+        self.max_entries = max_entries or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.client = get_redis(redis_url)
+
+        self._lock = threading.Lock()
+        self._synced_until = None  # newest creation time pulled from Redis
+        self._ids = []
+        self._intents = []
+        self._versions = []
+        self._created = []
+        self._vectors = None  # (n, dim) float32
+
+    def _entry_key(self, entry_id: str) -> str:
+        return f"{self.prefix}entry:{entry_id}"
+
+    def _index_key(self) -> str:
+        return f"{self.prefix}index"
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    # -----------------------------
+    # In-process index maintenance
+    # -----------------------------
+    def _append(self, entry_id: str, intent: str, version: str, created: float, vec: np.ndarray):
+        self._ids.append(entry_id)
+        self._intents.append(intent)
+        self._versions.append(version)
+        self._created.append(created)
+        row = vec.reshape(1, -1)
+        self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+
+    def _drop(self, positions):
+        if not positions:
+            return
+        dropped = set(positions)
+        keep = [i for i in range(len(self._ids)) if i not in dropped]
+        self._ids = [self._ids[i] for i in keep]
+        self._intents = [self._intents[i] for i in keep]
+        self._versions = [self._versions[i] for i in keep]
+        self._created = [self._created[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else None
+
+    def _expire(self, now: float):
+        stale = [i for i, ts in enumerate(self._created) if now - ts > self.ttl]
+        self._drop(stale)
+        # Same bound as the Redis index: keep the newest max_entries (synced entries may arrive out of order)
+        overflow = len(self._ids) - self.max_entries
+        if overflow > 0:
+            self._drop(np.argsort(self._created, kind="stable")[:overflow].tolist())
+
+    def _sync(self, now: float):
+        """Pull entries added to the Redis index (by any worker) since the last sync."""
+        since = now - self.ttl
+        if self._synced_until is not None:
+            since = max(since, self._synced_until)
+        try:
+            # Inclusive bound: entries sharing the last timestamp are skipped by id below
+            new = self.client.zrangebyscore(self._index_key(), since, "+inf", withscores=True)
+            known = set(self._ids)
+            new = [(entry_id.decode(), score) for entry_id, score in new if entry_id.decode() not in known]
+            if not new:
+                return
+            pipe = self.client.pipeline(transaction=False)
+            for entry_id, _ in new:
+                pipe.hmget(self._entry_key(entry_id), "vec", "intent", "version", "created")
+            for (entry_id, score), (vec, intent, version, created) in zip(new, pipe.execute()):
+                self._synced_until = max(self._synced_until or score, score)
+                if vec is None:
+                    continue
+                self._append(
+                    entry_id,
+                    intent.decode(),
+                    version.decode() if version else "",
+                    float(created),
+                    np.frombuffer(vec, dtype=np.float32),
+                )
+        except Exception as e:
+            print("Semantic cache sync failed", e)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def lookup(self, query_vector, intent: str, index_version: str) -> Optional[dict]:
+        """
+        Return the stored payload of the most similar previous query with the
+        same intent and index version, or None if nothing clears the
+        similarity threshold.
+        """
+        vec = self._normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            self._sync(now)
+            self._expire(now)
+            if self._vectors is None:
+                SEMANTIC_CACHE_LOOKUPS.labels(result="miss").inc()
+                return None
+
+            scores = self._vectors @ vec
+            mask = np.array([
+                i == intent and v == index_version for i, v in zip(self._intents, self._versions)
+            ])
+            scores = np.where(mask, scores, -1.0)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            entry_id = self._ids[best]
+
+        if score < self.threshold:
+            result = "near_miss" if score >= self.near_miss else "miss"
+            SEMANTIC_CACHE_LOOKUPS.labels(result=result).inc()
+            return None
+
+        try:
+            payload = self.client.hget(self._entry_key(entry_id), "payload")
+        except Exception as e:
+            print("Semantic cache get failed", e)
+            payload = None
+        if not payload:
+            # Expired or evicted in Redis by another worker
+            with self._lock:
+                if entry_id in self._ids:
+                    self._drop([self._ids.index(entry_id)])
+            SEMANTIC_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        SEMANTIC_CACHE_LOOKUPS.labels(result="hit").inc()
+        return json.loads(payload)
+
+    def add(self, query_vector, intent: str, payload: dict, index_version: str):
+        """Store a payload for a query embedding, evicting the oldest entries when full."""
+        vec = self._normalize(query_vector)
+        entry_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            self._sync(now)
+            self._append(entry_id, intent, index_version, now, vec)
+            self._expire(now)
+
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            key = self._entry_key(entry_id)
+            pipe.hset(key, mapping={
+                "vec": vec.tobytes(),
+                "intent": intent,
+                "version": index_version,
+                "created": str(now),
+                "payload": json.dumps(payload),
+            })
+            pipe.expire(key, self.ttl)
+            pipe.zadd(self._index_key(), {entry_id: now})
+            # Global bound: drop expired ids, then all but the newest max_entries
+            # (their entry hashes age out with their own TTL)
+            pipe.zremrangebyscore(self._index_key(), "-inf", now - self.ttl)
+            pipe.zremrangebyrank(self._index_key(), 0, -self.max_entries - 1)
+            pipe.execute()
+        except Exception as e:
+            print("Semantic cache set failed", e)
+
+
+semantic_cache = SemanticCache()
@@ -6,3 +6,4 @@ class QueryRequest(BaseModel):
     thread_id: Optional[str] = None
     checkpoint_ns: Optional[str] = None
     checkpoint_id: Optional[str] = None
+    persist: Optional[bool] = None  # None = settings.CHECKPOINT_PERSIST
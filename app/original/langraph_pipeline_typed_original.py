@@ -21,16 +21,28 @@ class EvaluationResult(BaseModel):
     reason: str = Field(..., description="Short explanation")
 class AnswerGeneration(BaseModel):
     answer: str = Field(..., description="Generated answer based on context and user query")
+
+class GroundedAnswer(BaseModel):
+    answer: str = Field(..., description="Answer based only on the context")
+    confidence: float = Field(..., description="0.0 to 1.0, how well the context supports the answer")
+    sufficient: bool = Field(..., description="Whether the context fully answers the user")
+    reason: str = Field(..., description="Short explanation")
+    cited_chunks: List[str] = Field(default_factory=list, description="Source ids of the passages the answer uses")
     
 class PipelineState(BaseModel):
     user_query: str
     intent: Optional[str] = None
     compressed_docs: Optional[List] = None
+    candidate_docs: Optional[dict] = None
     kb_answer: Optional[str] = None
     eval_confidence: Optional[float] = None
     eval_sufficient: Optional[bool] = None
     eval_reason: Optional[str] = None
     final_response: Optional[dict] = None
+    cache_hit: Optional[bool] = None
+    reflection_pool: Optional[List] = None
+    cited_chunks: Optional[List[str]] = None
+    started_at: Optional[float] = None
 
 llm = ChatOllama(model="qwen:latest", temperature=0, # Context window
     num_predict=512,  # Max tokens to generate
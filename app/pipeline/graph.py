@@ -1,38 +1,124 @@
 from langgraph.graph.state import StateGraph, START,END
 from app.original.langraph_pipeline_typed_original import PipelineState
-from app.pipeline.nodes.intent_node import classify_intent
-from app.pipeline.nodes.retrieve_node import retrieve_docs
-from app.pipeline.nodes.generate_node import generate_answer
-from app.pipeline.nodes.evaluate_node import evaluate_answer
+from app.pipeline.nodes.intent_node import classify_intent, aclassify_intent
+from app.pipeline.nodes.retrieve_node import retrieve_docs, aretrieve_docs, get_vectorstore
+from app.pipeline.nodes.generate_node import generate_answer, agenerate_answer, astream_answer
+from app.pipeline.nodes.evaluate_node import evaluate_answer, aevaluate_answer
+from app.pipeline.nodes.judge_node import generate_and_judge, agenerate_and_judge
 from app.pipeline.nodes.postprocess_node import postprocess
+from app.pipeline.nodes.cache_node import (
+    result_cache_lookup, aresult_cache_lookup,
+    semantic_cache_lookup, asemantic_cache_lookup,
+    cache_store, acache_store,
+    route_after_result_cache, route_after_result_cache_speculative, route_after_cache,
+)
+from app.pipeline.nodes.speculative_node import (
+    classify_intent_only, aclassify_intent_only,
+    prefetch_candidates, aprefetch_candidates,
+    select_candidates, aselect_candidates,
+)
+from app.config import settings
+from app.utils.metrics import timed_node
 from app.memory.redis_checkpoint import checkpointer
-# from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.memory import MemorySaver
 
-# # Initialize checkpointer
-# checkpointer = MemorySaver()
+# Checkpoints store retrieved chunks by docstore id; resolve them from the vectorstore
+checkpointer.doc_resolver = lambda ids: get_vectorstore().get_documents(ids)
+
+# One-shot queries: checkpoints live in process memory only and are dropped
+# (ephemeral_checkpointer.delete_thread) once the request finishes
+ephemeral_checkpointer = MemorySaver()
+
+def build_graph(async_mode: bool = False, speculative: bool = None, saver=None, streaming: bool = False,
+                single_call: bool = None):
+    """
+    Build the helpdesk graph.
+
+    With async_mode=True the LLM nodes use ainvoke and blocking retrieval runs on
+    the bounded executor; the compiled graph must then be driven with ainvoke.
+    With speculative=True (default: settings.SPECULATIVE_RETRIEVAL) candidate
+    search on every shard runs in parallel with intent classification.
+    `saver` defaults to the Redis checkpointer.
+    With streaming=True (async only) the answer is generated as plain text
+    and its tokens are written to the "custom" stream as they arrive.
+    With single_call=True (default: settings.SINGLE_CALL_GENERATION) one
+    structured call generates and judges the answer ("generate_judge")
+    instead of the generate -> evaluate pair. Streaming graphs always use
+    the pair: a structured response can't be streamed as answer tokens.
+    """
+    if speculative is None:
+        speculative = settings.SPECULATIVE_RETRIEVAL
+    if single_call is None:
+        single_call = settings.SINGLE_CALL_GENERATION and not streaming
 
-def build_graph():
     graph = StateGraph(PipelineState)
 
-    graph.add_node("intent", classify_intent)
-    graph.add_node("retrieve", retrieve_docs)
-    graph.add_node("generate", generate_answer)
-    graph.add_node("evaluate", evaluate_answer)
-    graph.add_node("final", postprocess)
+    def add_node(name, func):
+        # Every node's latency lands in helpdesk_node_latency_seconds{node=name}
+        graph.add_node(name, timed_node(name, func))
+
+    if async_mode:
+        add_node("result_cache", aresult_cache_lookup)
+        add_node("cache_lookup", asemantic_cache_lookup)
+        if single_call:
+            add_node("generate_judge", agenerate_and_judge)
+        else:
+            add_node("generate", astream_answer if streaming else agenerate_answer)
+            add_node("evaluate", aevaluate_answer)
+        add_node("cache_store", acache_store)
+    else:
+        add_node("result_cache", result_cache_lookup)
+        add_node("cache_lookup", semantic_cache_lookup)
+        if single_call:
+            add_node("generate_judge", generate_and_judge)
+        else:
+            add_node("generate", generate_answer)
+            add_node("evaluate", evaluate_answer)
+        add_node("cache_store", cache_store)
+    add_node("final", postprocess)
+
+    graph.set_entry_point("result_cache")
+
+    if speculative:
+        # Parallel branches may only write their own keys
+        add_node("intent", aclassify_intent_only if async_mode else classify_intent_only)
+        add_node("prefetch", aprefetch_candidates if async_mode else prefetch_candidates)
+        add_node("retrieve", aselect_candidates if async_mode else select_candidates)
+
+        # Exact repeat: straight to postprocess; otherwise fan out intent + prefetch
+        graph.add_conditional_edges(
+            "result_cache", route_after_result_cache_speculative, ["intent", "prefetch", "final"]
+        )
+        graph.add_edge(["intent", "prefetch"], "cache_lookup")
+    else:
+        add_node("intent", aclassify_intent if async_mode else classify_intent)
+        add_node("retrieve", aretrieve_docs if async_mode else retrieve_docs)
 
-    graph.set_entry_point("intent")
+        # Exact repeat of an answered query: skip every LLM call, postprocess still runs
+        graph.add_conditional_edges("result_cache", route_after_result_cache, ["intent", "final"])
+        graph.add_edge("intent", "cache_lookup")
 
-    graph.add_edge("intent", "retrieve")
-    graph.add_edge("retrieve", "generate")
-    graph.add_edge("generate", "evaluate")
-    graph.add_edge("evaluate", "final")
-    graph.add_edge("final", END)
+    # Semantic cache hit: skip retrieve/generate/evaluate, postprocess still runs
+    graph.add_conditional_edges("cache_lookup", route_after_cache, ["retrieve", "final"])
+    if single_call:
+        graph.add_edge("retrieve", "generate_judge")
+        graph.add_edge("generate_judge", "final")
+    else:
+        graph.add_edge("retrieve", "generate")
+        graph.add_edge("generate", "evaluate")
+        graph.add_edge("evaluate", "final")
+    graph.add_edge("final", "cache_store")
+    graph.add_edge("cache_store", END)
 
 
-    compiled = graph.compile(checkpointer=checkpointer)
+    compiled = graph.compile(checkpointer=saver or checkpointer)
 
     # Latest LangGraph: no arguments needed
     workflow = compiled.with_types()
 
     return workflow
 workflow = build_graph()
+async_workflow = build_graph(async_mode=True)
+async_ephemeral_workflow = build_graph(async_mode=True, saver=ephemeral_checkpointer)
+async_stream_workflow = build_graph(async_mode=True, streaming=True)
+async_ephemeral_stream_workflow = build_graph(async_mode=True, saver=ephemeral_checkpointer, streaming=True)
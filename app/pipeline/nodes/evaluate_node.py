@@ -1,7 +1,10 @@
 from app.llm.llm_factory import evaluation_llm
 from langchain.prompts import ChatPromptTemplate
-from app.pipeline.nodes.retrieve_node import retrieve_docs
-from app.pipeline.nodes.generate_node import generate_answer
+from app.utils.metrics import EVALUATIONS
+from app.pipeline.nodes.reflection import reflection_decision, restore, snapshot
+from app.pipeline.nodes.retrieve_node import widen_retrieval
+from app.pipeline.nodes.generate_node import generate_answer, agenerate_answer
+from app.utils.executor import run_blocking
 
 prompt = ChatPromptTemplate.from_template("""
 Evaluate if the ANSWER fully and correctly matches CONTEXT.
@@ -10,26 +13,69 @@ User: {question}
 Answer: {answer}
 """)
 
-def evaluate_answer(state):
-    chain = prompt | evaluation_llm
-    result = chain.invoke({"question": state.user_query, "answer": state.kb_answer})
+def _apply_result(state, result):
     state.eval_confidence = result.confidence
     state.eval_sufficient = result.sufficient
     state.eval_reason = result.reason
+    return state
+
+def evaluate_once(state):
+    """One evaluation call on the current answer (no reflection)."""
+    chain = prompt | evaluation_llm
+    return _apply_result(state, chain.invoke({"question": state.user_query, "answer": state.kb_answer}))
+
+async def aevaluate_once(state):
+    chain = prompt | evaluation_llm
+    return _apply_result(state, await chain.ainvoke({"question": state.user_query, "answer": state.kb_answer}))
+
+def evaluate_answer(state):
+    state = evaluate_once(state)
+
+    # Reflection loop: widen into the first pass's unscored candidates, regenerate and re-evaluate once
+    decision = reflection_decision(state)
+    saved = snapshot(state)
+    try:
+        if decision == "triggered":
+            docs = widen_retrieval(state)
+            if docs is None:
+                decision = "no_new_docs"
+            else:
+                state.compressed_docs = docs
+                state = generate_answer(state)
+                if not state.kb_answer:
+                    raise RuntimeError("regeneration produced no answer")
+                state = evaluate_once(state)
+    except Exception as e:
+        # Log and keep the first answer together with its own evaluation and docs
+        print('Reflection loop failed:', e)
+        state = restore(state, saved)
+
+    EVALUATIONS.labels(reflection=decision).inc()
+    # Don't carry the pool through the remaining checkpoints
+    state.reflection_pool = None
+    return state
+
+
+async def aevaluate_answer(state):
+    state = await aevaluate_once(state)
 
-    # Reflection loop: if insufficient or low confidence, try one re-retrieval with higher k and regenerate
+    decision = reflection_decision(state)
+    saved = snapshot(state)
     try:
-        if not state.eval_sufficient or (state.eval_confidence is not None and state.eval_confidence < 0.8):
-            # increase retrieval breadth
-            state = retrieve_docs(state, override_k=20)
-            state = generate_answer(state)
-            # re-evaluate once
-            result2 = chain.invoke({"question": state.user_query, "answer": state.kb_answer})
-            state.eval_confidence = result2.confidence
-            state.eval_sufficient = result2.sufficient
-            state.eval_reason = result2.reason
+        if decision == "triggered":
+            docs = await run_blocking(widen_retrieval, state)
+            if docs is None:
+                decision = "no_new_docs"
+            else:
+                state.compressed_docs = docs
+                state = await agenerate_answer(state)
+                if not state.kb_answer:
+                    raise RuntimeError("regeneration produced no answer")
+                state = await aevaluate_once(state)
     except Exception as e:
-        # Log and continue with original evaluation
         print('Reflection loop failed:', e)
+        state = restore(state, saved)
 
-    return state
\ No newline at end of file
+    EVALUATIONS.labels(reflection=decision).inc()
+    state.reflection_pool = None
+    return state
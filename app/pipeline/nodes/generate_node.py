@@ -1,39 +1,103 @@
-from app.llm.llm_factory import get_answer_generation_llm
-from app.llm.prompts import STRICT_RAG_PROMPT
+from langgraph.config import get_stream_writer
+from app.llm.context import pack_context
+from app.llm.gateway import LLMOverloaded
+from app.llm.llm_factory import get_answer_generation_llm, get_streaming_answer_llm
+from app.llm.prompts import STRICT_RAG_PROMPT, STREAM_RAG_PROMPT
+from app.utils.executor import run_blocking
 
-MAX_DOCS = 3  # max docs to include in context to avoid LLM freezing
+def build_context(state):
+    """
+    Retrieved docs packed into settings.CONTEXT_TOKEN_BUDGET tokens (oversized
+    chunks trimmed to their most query-relevant sentences). Returns
+    (context, source ids). Blocking: tokenizer.
+    """
+    context, sources, tokens = pack_context(state.user_query, state.compressed_docs or [])
+    print(f"[DEBUG] Packed {len(sources)}/{len(state.compressed_docs or [])} docs into {tokens} context tokens")
+    return context, sources
+
+def _build_prompt(state, template=STRICT_RAG_PROMPT):
+    context, _ = build_context(state)
+    return template.format(context=context, question=state.user_query)
+
+def _apply_response(state, response):
+    # Ensure structured response
+    if hasattr(response, "answer"):
+        state.kb_answer = response.answer
+        print("[DEBUG] LLM returned answer:", state.kb_answer[:200], "...")  # print first 200 chars
+    else:
+        print("[WARNING] LLM response missing 'answer' field. Returning empty string.")
+        state.kb_answer = ""
+    if isinstance(response.answer, bytes):
+        state.kb_answer = response.answer.decode("utf-8", errors="ignore")
+    else:
+        state.kb_answer = str(response.answer)
+    return state
 
 def generate_answer(state):
     try:
         print("\n[DEBUG] ENTER generate_answer_node")
-        # Safely limit the number of docs
-        docs_to_use = (state.compressed_docs or [])[:MAX_DOCS]
-        context = "\n\n".join([doc.page_content for doc in docs_to_use])
-        print(f"[DEBUG] Using {len(docs_to_use)} docs for context. Total characters: {len(context)}")
-
-        # Build prompt safely
-        prompt = STRICT_RAG_PROMPT.format(context=context, question=state.user_query)
+        prompt = _build_prompt(state)
         print("[DEBUG] Prompt constructed. Sending to LLM...")
 
         llm = get_answer_generation_llm()
         response = llm.invoke(prompt)
 
-        # Ensure structured response
-        if hasattr(response, "answer"):
-            state.kb_answer = response.answer
-            print("[DEBUG] LLM returned answer:", state.kb_answer[:200], "...")  # print first 200 chars
-        else:
-            print("[WARNING] LLM response missing 'answer' field. Returning empty string.")
-            state.kb_answer = ""
-        if isinstance(response.answer, bytes):
-            state.kb_answer = response.answer.decode("utf-8", errors="ignore")
-        else:
-            state.kb_answer = str(response.answer)
-            print("[DEBUG] EXIT generate_answer_node")
+        state = _apply_response(state, response)
+        print("[DEBUG] EXIT generate_answer_node")
         return state
 
+    except LLMOverloaded:
+        raise  # shed load: the request fails fast with 503 instead of an empty answer
     except Exception as e:
         print("[ERROR] generate_answer_node failed:", e)
         state.kb_answer = ""
         return state
 
+
+async def agenerate_answer(state):
+    try:
+        print("\n[DEBUG] ENTER agenerate_answer_node")
+        prompt = await run_blocking(_build_prompt, state)
+
+        llm = get_answer_generation_llm()
+        response = await llm.ainvoke(prompt)
+
+        state = _apply_response(state, response)
+        print("[DEBUG] EXIT agenerate_answer_node")
+        return state
+
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        print("[ERROR] agenerate_answer_node failed:", e)
+        state.kb_answer = ""
+        return state
+
+
+async def astream_answer(state):
+    """
+    Streaming generate: plain-text answer from llm.astream, every chunk is
+    pushed to the graph's "custom" stream as {"token": text} while it is
+    being produced (no-op unless the graph is streamed with that mode).
+    """
+    try:
+        print("\n[DEBUG] ENTER astream_answer_node")
+        prompt = await run_blocking(_build_prompt, state, STREAM_RAG_PROMPT)
+        write = get_stream_writer()
+
+        parts = []
+        async for chunk in get_streaming_answer_llm().astream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                write({"token": chunk.content})
+
+        state.kb_answer = "".join(parts).strip()
+        print("[DEBUG] EXIT astream_answer_node")
+        return state
+
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        print("[ERROR] astream_answer_node failed:", e)
+        state.kb_answer = ""
+        return state
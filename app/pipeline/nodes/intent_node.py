@@ -2,21 +2,87 @@
 # intent_node.py
 # -------------------------
 
+import os
+from app.config import settings
 from app.llm.llm_factory import get_intent_llm
 from app.llm.prompts import STRICT_INTENT_PROMPT  # define a prompt template for intent classification
+from app.pipeline.nodes.retrieve_node import PERSIST_DIR, get_vectorstore
+from app.vectorstore.intent_classifier import CENTROIDS_FILE, INTENT_CLASSIFICATIONS, CentroidIntentClassifier
+from app.utils.executor import run_blocking
 import json
+
+_classifier = None
+_classifier_mtime = None
+
+def _get_classifier():
+    """Centroids from disk, reloaded whenever train_intent_classifier.py rewrites (or creates) the file."""
+    global _classifier, _classifier_mtime
+    path = os.path.join(PERSIST_DIR, CENTROIDS_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if mtime != _classifier_mtime:
+        _classifier = CentroidIntentClassifier.load(path) if mtime is not None else None
+        _classifier_mtime = mtime
+    return _classifier
+
+def _classify_locally(query: str):
+    """
+    Nearest-centroid intent on the (cached) query embedding retrieval reuses.
+    Returns None when disabled, untrained, or the margin is too small.
+    """
+    if not settings.INTENT_CLASSIFIER_ENABLED:
+        return None
+    try:
+        classifier = _get_classifier()
+        if classifier is None:
+            return None
+        return classifier.classify(get_vectorstore().embeddings.embed_query(query))
+    except Exception as e:
+        print("[ERROR] local intent classification failed:", e)
+        return None
+
+def _llm_path() -> str:
+    return "llm_fallback" if settings.INTENT_CLASSIFIER_ENABLED and _classifier is not None else "llm"
+
 def classify_intent(state):
     print("\n[DEBUG] ENTER classify_intent_node")
     print("[DEBUG] incoming state =", state.model_dump())
 
-    llm = get_intent_llm()
-    prompt = STRICT_INTENT_PROMPT.format(question=state.user_query)
-    
-    response = llm.invoke(prompt)  # returns Intentclassify
+    intent = _classify_locally(state.user_query)
+    if intent is not None:
+        INTENT_CLASSIFICATIONS.labels(path="local").inc()
+        state.intent = intent
+    else:
+        INTENT_CLASSIFICATIONS.labels(path=_llm_path()).inc()
+        llm = get_intent_llm()
+        prompt = STRICT_INTENT_PROMPT.format(question=state.user_query)
+        
+        response = llm.invoke(prompt)  # returns Intentclassify
 
-    # Directly access the Intent field
-    state.intent = response.Intent
+        # Directly access the Intent field
+        state.intent = response.Intent
 
     print("[DEBUG] EXIT classify_intent_node")
     print("[DEBUG] returning state =", state.model_dump())
     return state
+
+
+async def aclassify_intent(state):
+    print("\n[DEBUG] ENTER aclassify_intent_node")
+
+    intent = await run_blocking(_classify_locally, state.user_query)
+    if intent is not None:
+        INTENT_CLASSIFICATIONS.labels(path="local").inc()
+        state.intent = intent
+    else:
+        INTENT_CLASSIFICATIONS.labels(path=_llm_path()).inc()
+        llm = get_intent_llm()
+        prompt = STRICT_INTENT_PROMPT.format(question=state.user_query)
+
+        response = await llm.ainvoke(prompt)  # returns Intentclassify
+        state.intent = response.Intent
+
+    print("[DEBUG] EXIT aclassify_intent_node")
+    return state
@@ -0,0 +1,110 @@
+# app/pipeline/nodes/judge_node.py
+#
+# Single-call mode (settings.SINGLE_CALL_GENERATION): one structured LLM call
+# answers from the retrieved context and grades its own grounding, replacing
+# the generate -> evaluate pair. Unlike the evaluation prompt, the judge sees
+# the context it is grading against.
+
+from app.llm.gateway import LLMOverloaded
+from app.llm.llm_factory import get_grounded_answer_llm
+from app.llm.prompts import GROUNDED_RAG_PROMPT
+from app.pipeline.nodes.generate_node import build_context
+from app.pipeline.nodes.reflection import reflection_decision, restore, snapshot
+from app.pipeline.nodes.retrieve_node import widen_retrieval
+from app.utils.executor import run_blocking
+from app.utils.metrics import EVALUATIONS
+
+def _build_prompt(state):
+    """(prompt, source ids in the packed context)"""
+    context, sources = build_context(state)
+    return GROUNDED_RAG_PROMPT.format(context=context, question=state.user_query), sources
+
+def _apply_response(state, response, sources):
+    state.kb_answer = str(response.answer)
+    state.eval_confidence = response.confidence
+    state.eval_sufficient = response.sufficient
+    state.eval_reason = response.reason
+    # Only keep citations that point at a passage we actually sent
+    state.cited_chunks = [c for c in response.cited_chunks or [] if c in sources]
+    return state
+
+def _apply_failure(state, e):
+    print("[ERROR] generate_judge_node failed:", e)
+    # Confidence 0 is below the reflection band: escalate instead of retrying
+    state.kb_answer = ""
+    state.eval_confidence = 0.0
+    state.eval_sufficient = False
+    state.eval_reason = f"Generation failed: {e}"
+    state.cited_chunks = []
+    return state
+
+def judge_once(state):
+    """One generate+judge call on the current docs (no reflection)."""
+    try:
+        prompt, sources = _build_prompt(state)
+        return _apply_response(state, get_grounded_answer_llm().invoke(prompt), sources)
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return _apply_failure(state, e)
+
+async def ajudge_once(state):
+    try:
+        prompt, sources = await run_blocking(_build_prompt, state)
+        return _apply_response(state, await get_grounded_answer_llm().ainvoke(prompt), sources)
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return _apply_failure(state, e)
+
+def generate_and_judge(state):
+    print("\n[DEBUG] ENTER generate_judge_node")
+    state = judge_once(state)
+
+    # Same gated reflection as evaluate_answer, at one LLM call instead of two
+    decision = reflection_decision(state)
+    saved = snapshot(state)
+    try:
+        if decision == "triggered":
+            docs = widen_retrieval(state)
+            if docs is None:
+                decision = "no_new_docs"
+            else:
+                state.compressed_docs = docs
+                state = judge_once(state)
+                if not state.kb_answer:
+                    raise RuntimeError("regeneration produced no answer")
+    except Exception as e:
+        print('Reflection loop failed:', e)
+        state = restore(state, saved)
+
+    EVALUATIONS.labels(reflection=decision).inc()
+    state.reflection_pool = None
+    print("[DEBUG] EXIT generate_judge_node")
+    return state
+
+
+async def agenerate_and_judge(state):
+    print("\n[DEBUG] ENTER agenerate_judge_node")
+    state = await ajudge_once(state)
+
+    decision = reflection_decision(state)
+    saved = snapshot(state)
+    try:
+        if decision == "triggered":
+            docs = await run_blocking(widen_retrieval, state)
+            if docs is None:
+                decision = "no_new_docs"
+            else:
+                state.compressed_docs = docs
+                state = await ajudge_once(state)
+                if not state.kb_answer:
+                    raise RuntimeError("regeneration produced no answer")
+    except Exception as e:
+        print('Reflection loop failed:', e)
+        state = restore(state, saved)
+
+    EVALUATIONS.labels(reflection=decision).inc()
+    state.reflection_pool = None
+    print("[DEBUG] EXIT agenerate_judge_node")
+    return state
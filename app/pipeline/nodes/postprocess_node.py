@@ -15,6 +15,8 @@ def postprocess(state: PipelineState) -> PipelineState:
     else:
         response["answer"] = "KB answer insufficient. Escalating to human/HR."
     print(f"[DEBUG] KB sufficient? {state.eval_sufficient}")
+    if state.cited_chunks:
+        response["sources"] = state.cited_chunks
 
     # --- Ticket Logic ---
     create_ticket = False
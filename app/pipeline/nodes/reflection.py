@@ -0,0 +1,36 @@
+# app/pipeline/nodes/reflection.py
+#
+# Reflection-loop helpers shared by the evaluate node and the single-call
+# generate+judge node: when to run a second pass, and how to undo one that
+# fails part-way.
+
+import time
+from app.config import settings
+
+# What a reflection pass may overwrite; put back if the pass fails part-way
+REFLECTED_FIELDS = ("compressed_docs", "kb_answer", "eval_confidence", "eval_sufficient", "eval_reason", "cited_chunks")
+
+def reflection_decision(state) -> str:
+    """
+    "triggered", or why the reflection loop is skipped. It only runs for
+    answers inside the confidence band, and only while a second pass (which
+    costs about as much as the first) still fits the request's latency budget.
+    """
+    confidence = state.eval_confidence
+    if state.eval_sufficient and (confidence is None or confidence >= settings.REFLECTION_CONFIDENCE_MAX):
+        return "not_needed"
+    if confidence is not None and confidence < settings.REFLECTION_CONFIDENCE_MIN:
+        return "out_of_band"
+    if settings.REFLECTION_BUDGET_MS and state.started_at:
+        elapsed_ms = (time.time() - state.started_at) * 1000
+        if 2 * elapsed_ms > settings.REFLECTION_BUDGET_MS:
+            return "over_budget"
+    return "triggered"
+
+def snapshot(state) -> dict:
+    return {field: getattr(state, field) for field in REFLECTED_FIELDS}
+
+def restore(state, saved: dict):
+    for field, value in saved.items():
+        setattr(state, field, value)
+    return state
@@ -1,44 +1,129 @@
+from langchain_core.documents import Document
 from app.vectorstore.load_vectorstore import load_vectorstore
-from app.memory.cache import get_cached, set_cached
-from langchain.retrievers import ContextualCompressionRetriever
-from langchain_community.document_compressors import FlashrankRerank
+from app.memory.cache import get_cached, set_cached, aget_cached, aset_cached
+from app.config import settings
+from app.vectorstore.reranker import reranker, chunk_id
+from app.utils.executor import run_blocking
+from app.utils.metrics import RETRIEVAL_LATENCY
+
+PERSIST_DIR = '/home/kirti/helpdesk_rag_project/data/vector_db'
+FIRST_PASS_K = 10  # candidates reranked on the first pass
 
 vectorstore = None
 
 def _ensure_vs():
     global vectorstore
     if vectorstore is None:
-        vectorstore = load_vectorstore(persist_dir='/home/kirti/helpdesk_rag_project/data/vector_db')
+        vectorstore = load_vectorstore(persist_dir=PERSIST_DIR)
+
+def get_vectorstore():
+    _ensure_vs()
+    return vectorstore
+
+def _rehydrate(refs):
+    """Documents for cached (docstore id, score) pairs; None if any chunk is gone."""
+    if not refs:
+        return None
+    found = vectorstore.get_documents([doc_id for doc_id, _ in refs])
+    if len(found) < len(refs):
+        return None
+    return [
+        Document(
+            id=doc_id,
+            page_content=found[doc_id].page_content,
+            metadata={**found[doc_id].metadata, "relevance_score": score},
+        )
+        for doc_id, score in refs
+    ]
+
+def get_cached_docs(query: str):
+    _ensure_vs()
+    return _rehydrate(get_cached(query, vectorstore.version))
+
+def set_cached_docs(query: str, docs):
+    set_cached(query, docs, vectorstore.version)
+
+def _search(state, k: int):
+    _ensure_vs()
+
+    # Route straight to the intent's shard (legacy single index: metadata filter)
+    retriever = vectorstore.as_retriever(state.intent, search_type="mmr", k=k)
+    with RETRIEVAL_LATENCY.labels(stage="search").time():
+        return retriever.invoke(state.user_query)
+
+def _search_and_rerank(state, k: int):
+    """
+    Search once for max(k, REFLECTION_POOL_K) candidates and rerank the first k.
+    Returns (reranked docs, unscored rest): the rest is what a reflection pass
+    widens into, so it never has to search again.
+    """
+    candidates = _search(state, max(k, settings.REFLECTION_POOL_K))
+
+    # Shared, batching reranker (model loaded once, scores memoized per query/chunk)
+    return reranker.rerank(state.user_query, candidates[:k]), candidates[k:]
+
+def widen_retrieval(state):
+    """
+    Reflection: rerank only the candidates the first pass did not score and
+    merge them into its top docs. Returns the new top docs, or None when
+    they are the same documents as before (regenerating would not help).
+    """
+    pool = state.reflection_pool
+    if pool is None:
+        # First pass came from the retrieval cache: one wider search now
+        seen = {chunk_id(doc) for doc in state.compressed_docs or []}
+        pool = [doc for doc in _search(state, settings.REFLECTION_POOL_K) if chunk_id(doc) not in seen]
+    if not pool:
+        return None
+
+    current = state.compressed_docs or []
+    merged = sorted(
+        current + reranker.rerank(state.user_query, pool),
+        key=lambda doc: doc.metadata.get("relevance_score") or 0.0,
+        reverse=True,
+    )[:settings.RERANK_TOP_N]
+    if {chunk_id(doc) for doc in merged} == {chunk_id(doc) for doc in current}:
+        return None
+    return merged
 
 def retrieve_docs(state, override_k: int = None):
     _ensure_vs()
 
     # ✅ CACHE LOOKUP (QUERY ONLY)
-    cached = get_cached(state.user_query)
-    if cached and override_k is None:
-        state.compressed_docs = cached
-        return state
+    if override_k is None:
+        cached = get_cached_docs(state.user_query)
+        if cached:
+            state.compressed_docs = cached
+            return state
 
-    k = override_k or 10
+    compressed_docs, state.reflection_pool = _search_and_rerank(state, override_k or FIRST_PASS_K)
+    state.compressed_docs = compressed_docs
 
-    retriever = vectorstore.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": k},
-        filter={"intent": state.intent}   # ✅ filtering is fine here
-    )
+    # ✅ CACHE STORE (QUERY ONLY)
+    if override_k is None:
+        set_cached_docs(state.user_query, compressed_docs)
 
-    compressor = FlashrankRerank()
+    return state
 
-    c_retriever = ContextualCompressionRetriever(
-        base_retriever=retriever,
-        base_compressor=compressor
-    )
 
-    compressed_docs = c_retriever.invoke(state.user_query)
+async def aretrieve_docs(state, override_k: int = None):
+    """
+    Async variant: the cache round trips use the async Redis pool; FAISS
+    search, rerank and docstore rehydration run on the bounded executor.
+    """
+    if vectorstore is None:
+        await run_blocking(_ensure_vs)
+    if override_k is None:
+        refs = await aget_cached(state.user_query, vectorstore.version)
+        cached = await run_blocking(_rehydrate, refs) if refs else None
+        if cached:
+            state.compressed_docs = cached
+            return state
+
+    compressed_docs, state.reflection_pool = await run_blocking(_search_and_rerank, state, override_k or FIRST_PASS_K)
     state.compressed_docs = compressed_docs
 
-    # ✅ CACHE STORE (QUERY ONLY)
     if override_k is None:
-        set_cached(state.user_query, compressed_docs)
+        await aset_cached(state.user_query, compressed_docs, vectorstore.version)
 
     return state
@@ -0,0 +1,49 @@
+# app/pipeline/nodes/speculative_node.py
+#
+# Speculative retrieval: candidate search runs alongside classify_intent and the
+# matching shard's candidates are picked (and reranked) once the intent is known.
+# Parallel branches must only return the keys they own, hence the dict returns.
+
+from app.pipeline.nodes.intent_node import classify_intent, aclassify_intent
+from app.config import settings
+from app.pipeline.nodes.retrieve_node import FIRST_PASS_K, get_vectorstore, get_cached_docs, set_cached_docs
+from app.vectorstore.reranker import reranker
+from app.utils.executor import run_blocking
+from app.utils.metrics import RETRIEVAL_LATENCY
+
+def classify_intent_only(state):
+    return {"intent": classify_intent(state).intent}
+
+async def aclassify_intent_only(state):
+    return {"intent": (await aclassify_intent(state)).intent}
+
+def prefetch_candidates(state):
+    """Embed the query and search every shard while the intent is still being classified."""
+    cached = get_cached_docs(state.user_query)
+    if cached:
+        return {"compressed_docs": cached}
+
+    vectorstore = get_vectorstore()
+    with RETRIEVAL_LATENCY.labels(stage="search").time():
+        embedding = vectorstore.embeddings.embed_query(state.user_query)
+        candidates = vectorstore.search_candidates(embedding, k=max(FIRST_PASS_K, settings.REFLECTION_POOL_K))
+    return {"candidate_docs": candidates}
+
+def select_candidates(state):
+    """Join point: keep the resolved intent's candidates, rerank the first pass, pool the rest for reflection."""
+    if state.compressed_docs is None:
+        candidates = get_vectorstore().candidates_for(state.candidate_docs or {}, state.intent)
+        state.compressed_docs = reranker.rerank(state.user_query, candidates[:FIRST_PASS_K])
+        state.reflection_pool = candidates[FIRST_PASS_K:]
+        set_cached_docs(state.user_query, state.compressed_docs)
+
+    # Don't carry the unused shards' candidates through the remaining checkpoints
+    state.candidate_docs = None
+    return state
+
+
+async def aprefetch_candidates(state):
+    return await run_blocking(prefetch_candidates, state)
+
+async def aselect_candidates(state):
+    return await run_blocking(select_candidates, state)
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.models.api import QueryRequest
-from app.pipeline.graph import workflow
+from app.pipeline.graph import (
+    async_workflow, async_ephemeral_workflow,
+    async_stream_workflow, async_ephemeral_stream_workflow,
+    ephemeral_checkpointer,
+)
+from app.config import settings
+from app.llm.gateway import LLMOverloaded, set_request_deadline, reset_request_deadline
+import json
 import uuid
 import numpy as np
 import torch
@@ -31,28 +38,41 @@ def convert_to_json_serializable(obj):
     else:
         return obj
 
+def _request_config(req: QueryRequest):
+    """(thread_id, checkpoint_ns, checkpoint_id, graph config, persist) for a request."""
+    thread_id = req.thread_id or str(uuid.uuid4())
+    checkpoint_ns = req.checkpoint_ns or "helpdesk_ns"
+    checkpoint_id = req.checkpoint_id or str(uuid.uuid4())
+
+    config = {
+        "configurable": {
+            "thread_id": str(uuid.uuid4()),
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id
+        }
+    }
+    persist = settings.CHECKPOINT_PERSIST if req.persist is None else req.persist
+    return thread_id, checkpoint_ns, checkpoint_id, config, persist
+
 @router.post("/helpdesk", response_class=JSONResponse)
-def handle_helpdesk(req: QueryRequest):
+async def handle_helpdesk(req: QueryRequest):
     """
     Handle helpdesk queries using RAG pipeline.
     
     Returns JSON response with query results.
     """
+    deadline = set_request_deadline()
     try:
-        thread_id = req.thread_id or str(uuid.uuid4())
-        checkpoint_ns = req.checkpoint_ns or "helpdesk_ns"
-        checkpoint_id = req.checkpoint_id or str(uuid.uuid4())
-
-        config = {
-            "configurable": {
-                "thread_id": str(uuid.uuid4()),
-                "checkpoint_ns": checkpoint_ns,
-                "checkpoint_id": checkpoint_id
-            }
-        }
+        thread_id, checkpoint_ns, checkpoint_id, config, persist = _request_config(req)
 
         state_input = {"user_query": req.query}
-        final_state = workflow.invoke(state_input, config=config)
+        if persist:
+            final_state = await async_workflow.ainvoke(state_input, config=config)
+        else:
+            try:
+                final_state = await async_ephemeral_workflow.ainvoke(state_input, config=config)
+            finally:
+                ephemeral_checkpointer.delete_thread(config["configurable"]["thread_id"])
 
         # Convert final state to JSON-safe types
         safe_state = convert_to_json_serializable(final_state)
@@ -75,6 +95,9 @@ def handle_helpdesk(req: QueryRequest):
         # Use JSONResponse to bypass Pydantic serialization
         return JSONResponse(content=response_data)
 
+    except LLMOverloaded as e:
+        print(f"Shedding helpdesk request: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         import traceback
         error_details = {
@@ -83,3 +106,98 @@ def handle_helpdesk(req: QueryRequest):
         }
         print(f"Error in helpdesk endpoint: {error_details}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        reset_request_deadline(deadline)
+
+
+# -----------------------------
+# Server-Sent Events
+# -----------------------------
+TICKET_FIELDS = ("ticket_id", "ticket_summary", "ticket_error", "escalation", "reason")
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(convert_to_json_serializable(data))}\n\n"
+
+def _source(doc) -> dict:
+    metadata = getattr(doc, "metadata", {}) or {}
+    return {
+        "id": getattr(doc, "id", None),
+        "filename": metadata.get("filename"),
+        "page": metadata.get("page"),
+        "relevance_score": metadata.get("relevance_score"),
+    }
+
+def _node_events(node: str, update: dict):
+    """SSE events for one graph node update (full state after the node ran)."""
+    if node in ("result_cache", "cache_lookup") and update.get("cache_hit"):
+        yield _sse("progress", {"stage": "cache_hit", "cache": node})
+    elif node == "intent":
+        yield _sse("progress", {"stage": "intent", "intent": update.get("intent")})
+    elif node == "retrieve":
+        sources = [_source(doc) for doc in update.get("compressed_docs") or []]
+        yield _sse("progress", {"stage": "retrieve", "sources": sources})
+    elif node == "generate":
+        yield _sse("progress", {"stage": "generated"})
+    elif node == "evaluate":
+        # The reflection loop may have replaced the streamed answer
+        yield _sse("evaluation", {
+            "confidence": update.get("eval_confidence"),
+            "sufficient": update.get("eval_sufficient"),
+            "reason": update.get("eval_reason"),
+            "answer": update.get("kb_answer"),
+        })
+    elif node == "final":
+        final_response = update.get("final_response") or {}
+        yield _sse("ticket", {
+            "create_ticket": "ticket_id" in final_response or "ticket_error" in final_response,
+            **{k: final_response[k] for k in TICKET_FIELDS if k in final_response},
+        })
+        yield _sse("result", final_response)
+
+async def _stream_events(req: QueryRequest):
+    thread_id, checkpoint_ns, checkpoint_id, config, persist = _request_config(req)
+    workflow = async_stream_workflow if persist else async_ephemeral_stream_workflow
+    # The body is iterated in its own task (copied context): no reset needed
+    set_request_deadline()
+    try:
+        async for mode, chunk in workflow.astream(
+            {"user_query": req.query}, config=config, stream_mode=["updates", "custom"]
+        ):
+            if mode == "custom":
+                if "token" in chunk:
+                    yield _sse("token", {"text": chunk["token"]})
+                continue
+            for node, update in chunk.items():
+                for event in _node_events(node, update or {}):
+                    yield event
+
+        yield _sse("done", {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        })
+    except LLMOverloaded as e:
+        # Headers are already sent: report the shed request in-band
+        print(f"Shedding helpdesk stream: {e}")
+        yield _sse("error", {"error": str(e), "status": 503, "retry_after": e.retry_after})
+    except Exception as e:
+        import traceback
+        print(f"Error in helpdesk stream: {traceback.format_exc()}")
+        yield _sse("error", {"error": str(e)})
+    finally:
+        if not persist:
+            ephemeral_checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+@router.post("/helpdesk/stream")
+async def stream_helpdesk(req: QueryRequest):
+    """
+    Same pipeline as /helpdesk, as Server-Sent Events:
+    progress (cache_hit / intent / retrieve / generated), token (answer text
+    as it is generated), then evaluation, ticket, result and done
+    (or error; with status 503 and retry_after when the LLM is overloaded).
+    """
+    return StreamingResponse(
+        _stream_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,20 @@
+# app/utils/executor.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+
+# Bounded pool for blocking work (FAISS search, rerank, sync Redis) so async
+# request handlers never pin the event loop or Starlette's default threadpool.
+blocking_executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_POOL_SIZE,
+    thread_name_prefix="helpdesk-blocking",
+)
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable on the shared bounded executor and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,166 @@
+# app/utils/metrics.py
+#
+# Pipeline-level Prometheus metrics (default registry, served by /metrics in app.main).
+
+import asyncio
+import functools
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Gauge, Histogram
+
+# Fine-grained low end: cache lookups and routing nodes take well under 10 ms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+NODE_LATENCY = Histogram(
+    'helpdesk_node_latency_seconds',
+    'Latency of each graph node in seconds',
+    ['node'],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_CALLS = Counter(
+    'helpdesk_llm_calls_total',
+    'LLM calls by purpose and outcome',
+    ['purpose', 'status']  # purpose: intent | generate | evaluate | generate_judge; status: ok | error
+)
+LLM_LATENCY = Histogram(
+    'helpdesk_llm_latency_seconds',
+    'LLM call latency in seconds',
+    ['purpose'],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    'helpdesk_llm_tokens_total',
+    'Tokens reported by the model',
+    ['purpose', 'kind']  # kind: prompt | completion
+)
+
+LLM_QUEUE_DEPTH = Gauge(
+    'helpdesk_llm_queue_depth',
+    'Calls waiting for an LLM gateway slot',
+    ['model', 'lane']
+)
+LLM_IN_FLIGHT = Gauge(
+    'helpdesk_llm_in_flight',
+    'LLM calls holding a gateway slot',
+    ['model']
+)
+LLM_QUEUE_WAIT = Histogram(
+    'helpdesk_llm_queue_wait_seconds',
+    'Time spent waiting for an LLM gateway slot in seconds',
+    ['model', 'lane'],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REJECTED = Counter(
+    'helpdesk_llm_rejected_total',
+    'LLM calls shed by the gateway',
+    ['model', 'lane', 'reason']  # reason: predicted (expected wait past the deadline) | timeout
+)
+
+RETRIEVAL_LATENCY = Histogram(
+    'helpdesk_retrieval_latency_seconds',
+    'Retrieval stage latency in seconds',
+    ['stage'],  # search (query embedding + FAISS) | rerank
+    buckets=LATENCY_BUCKETS,
+)
+
+EVALUATIONS = Counter(
+    'helpdesk_evaluations_total',
+    'Answer evaluations by what the reflection loop did',
+    ['reflection']  # triggered | not_needed | out_of_band | over_budget | no_new_docs
+)
+
+CACHE_LOOKUPS = Counter(
+    'helpdesk_cache_lookups_total',
+    'Redis cache lookups by cache and result',
+    ['cache', 'result']  # cache: retrieval | result; result: hit | miss | stale
+)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    'helpdesk_semantic_cache_lookups_total',
+    'Semantic answer cache lookups by result',
+    ['result']  # hit | near_miss | miss
+)
+
+CHECKPOINT_RTT = Histogram(
+    'helpdesk_checkpoint_redis_seconds',
+    'Round-trip time of checkpoint saver Redis calls in seconds',
+    ['op'],  # put | put_writes | trim | latest | load | blobs
+    buckets=LATENCY_BUCKETS,
+)
+
+CHECKPOINT_COMPACTED = Counter(
+    'helpdesk_checkpoint_compacted_total',
+    'Redis checkpoint entries removed by the background compactor',
+    ['kind']  # orphaned_writes | stale_index_entries
+)
+
+
+def timed_node(name: str, func):
+    """Wrap a (sync or async) graph node so every run is observed in NODE_LATENCY."""
+    histogram = NODE_LATENCY.labels(node=name)
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state):
+            start = time.perf_counter()
+            try:
+                return await func(state)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Records count, latency and token usage of every chat model call made
+    through a runnable, labelled with `purpose`. Attach with
+    llm.with_config(callbacks=[LLMMetricsCallback("generate")]).
+    """
+
+    run_inline = True  # bookkeeping only; don't hop to a thread from async callers
+
+    def __init__(self, purpose: str):
+        self.purpose = purpose
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id, status: str):
+        with self._lock:
+            start = self._started.pop(run_id, None)
+        LLM_CALLS.labels(purpose=self.purpose, status=status).inc()
+        if start is not None:
+            LLM_LATENCY.labels(purpose=self.purpose).observe(time.perf_counter() - start)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, "ok")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(purpose=self.purpose, kind="prompt").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(purpose=self.purpose, kind="completion").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
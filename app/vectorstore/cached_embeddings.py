@@ -0,0 +1,110 @@
+# app/vectorstore/cached_embeddings.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.config import settings
+from app.memory.redis_pool import get_redis
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-process LRU and an optional Redis tier.
+
+    Vectors are stored as raw float32 bytes keyed by model name and
+    whitespace-normalized text, so a repeated query (e.g. the reflection
+    re-retrieval, or a semantic cache lookup followed by retrieval) is only
+    embedded once.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        model_name: str,
+        max_size: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        prefix: str = 'helpdesk:emb:',
+    ):
+        self.base = base
+        self.model_name = model_name
+        self.max_size = max_size or settings.EMBEDDING_CACHE_SIZE
+        self.ttl = ttl or settings.EMBEDDING_CACHE_TTL
+        self.prefix = prefix
+        self.client = get_redis(redis_url) if redis_url else None
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, text: str, kind: str = "doc") -> str:
+        # Query and document embeddings may use different instructions, keep them apart
+        normalized = " ".join(text.split())
+        h = hashlib.sha256(f"{self.model_name}\x00{kind}\x00{normalized}".encode()).hexdigest()[:32]
+        return f"{self.prefix}{h}"
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+            return vec
+
+    def _lru_put(self, key: str, vec: List[float]):
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> List[Optional[List[float]]]:
+        found = [self._lru_get(k) for k in keys]
+        missing = [i for i, v in enumerate(found) if v is None]
+        if not missing or self.client is None:
+            return found
+
+        try:
+            raw = self.client.mget([keys[i] for i in missing])
+        except Exception as e:
+            print("Embedding cache get failed", e)
+            return found
+
+        for i, blob in zip(missing, raw):
+            if blob:
+                vec = np.frombuffer(blob, dtype=np.float32).tolist()
+                self._lru_put(keys[i], vec)
+                found[i] = vec
+        return found
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        for k, v in zip(keys, vectors):
+            self._lru_put(k, v)
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for k, v in zip(keys, vectors):
+                pipe.set(k, np.asarray(v, dtype=np.float32).tobytes(), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print("Embedding cache set failed", e)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        vectors = self._lookup(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            computed = self.base.embed_documents([texts[i] for i in missing])
+            for i, vec in zip(missing, computed):
+                vectors[i] = vec
+            self._store([keys[i] for i in missing], computed)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, kind="query")
+        vec = self._lookup([key])[0]
+        if vec is None:
+            vec = self.base.embed_query(text)
+            self._store([key], [vec])
+        return vec
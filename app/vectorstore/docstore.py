@@ -0,0 +1,170 @@
+# app/vectorstore/docstore.py
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+def _mmap_flags(index_type: Optional[str]) -> int:
+    # IVF inverted lists are mmapped by IO_FLAG_MMAP; flat/HNSW codes need
+    # IO_FLAG_MMAP_IFC (absent on older FAISS builds). The two can't be combined.
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only, on-disk docstore: chunks are fetched lazily by ID (or by FAISS
+    position) instead of unpickling the whole corpus into every worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per-thread; the executor runs searches on many threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_document(doc_id: str, row) -> Document:
+        page_content, metadata = row
+        return Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._conn.execute(
+            "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+        ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return self._to_document(search, row)
+
+    def mget(self, ids: List[str]) -> Dict[str, Document]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            f"SELECT id, page_content, metadata FROM docs WHERE id IN ({placeholders})", list(ids)
+        ).fetchall()
+        return {row[0]: self._to_document(row[0], row[1:]) for row in rows}
+
+    def id_at(self, pos: int) -> Optional[str]:
+        row = self._conn.execute("SELECT id FROM docs WHERE pos = ?", (int(pos),)).fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def ids(self) -> Iterable[Tuple[int, str]]:
+        return self._conn.execute("SELECT pos, id FROM docs ORDER BY pos")
+
+    def rows(self) -> Iterable[Tuple[int, str, Document]]:
+        """(position, id, document) for every chunk, the same shape create() takes."""
+        for pos, doc_id, page_content, metadata in self._conn.execute(
+            "SELECT pos, id, page_content, metadata FROM docs ORDER BY pos"
+        ):
+            yield pos, doc_id, self._to_document(doc_id, (page_content, metadata))
+
+    @classmethod
+    def create(cls, path: str, rows: Iterable[Tuple[int, str, Document]]) -> "SQLiteDocstore":
+        """Write (FAISS position, docstore id, document) rows to a fresh SQLite file."""
+        if os.path.exists(path):
+            os.remove(path)
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute(
+                "CREATE TABLE docs (id TEXT PRIMARY KEY, pos INTEGER UNIQUE, page_content TEXT, metadata TEXT)"
+            )
+            conn.executemany(
+                "INSERT INTO docs VALUES (?, ?, ?, ?)",
+                ((doc_id, int(pos), doc.page_content, json.dumps(doc.metadata)) for pos, doc_id, doc in rows),
+            )
+        conn.close()
+        return cls(path)
+
+
+class SQLiteIndexMap(Mapping):
+    """Lazy FAISS position -> docstore id mapping backed by SQLiteDocstore."""
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self.docstore = docstore
+
+    def __getitem__(self, pos: int) -> str:
+        doc_id = self.docstore.id_at(pos)
+        if doc_id is None:
+            raise KeyError(pos)
+        return doc_id
+
+    def __len__(self) -> int:
+        return self.docstore.count()
+
+    def __iter__(self):
+        return (pos for pos, _ in self.docstore.ids())
+
+    def items(self):
+        return list(self.docstore.ids())
+
+    def values(self):
+        return [doc_id for _, doc_id in self.docstore.ids()]
+
+
+def save_mmap_shard(index, rows: Iterable[Tuple[int, str, Document]], persist_dir: str):
+    """Write a FAISS index and its (position, id, document) rows; rows may be a generator."""
+    os.makedirs(persist_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(persist_dir, INDEX_FILE))
+    SQLiteDocstore.create(os.path.join(persist_dir, DOCSTORE_FILE), rows)
+
+def save_mmap_store(vectorstore, persist_dir: str):
+    """Persist a LangChain FAISS store as a raw index.faiss plus docstore.sqlite (no pickle)."""
+    save_mmap_shard(
+        vectorstore.index,
+        (
+            (pos, doc_id, vectorstore.docstore.search(doc_id))
+            for pos, doc_id in vectorstore.index_to_docstore_id.items()
+        ),
+        persist_dir,
+    )
+
+def load_editable_store(persist_dir: str, embeddings):
+    """
+    Load a shard written by save_mmap_store fully into memory (regular FAISS
+    index, InMemoryDocstore) so it can be changed with add_embeddings/delete
+    and saved again. Used by incremental ingestion, not by the server.
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    index = faiss.read_index(os.path.join(persist_dir, INDEX_FILE))
+    rows = list(SQLiteDocstore(os.path.join(persist_dir, DOCSTORE_FILE)).rows())
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore({doc_id: doc for _, doc_id, doc in rows}),
+        index_to_docstore_id={pos: doc_id for pos, doc_id, _ in rows},
+    )
+
+def load_mmap_store(persist_dir: str, embeddings, index_type: Optional[str] = None):
+    """Open a store written by save_mmap_store: vectors are mmapped, documents read lazily."""
+    index = faiss.read_index(os.path.join(persist_dir, INDEX_FILE), _mmap_flags(index_type))
+    docstore = SQLiteDocstore(os.path.join(persist_dir, DOCSTORE_FILE))
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=SQLiteIndexMap(docstore),
+    )
@@ -0,0 +1,122 @@
+# app/vectorstore/embedding_store.py
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.txt"
+META_FILE = "meta.json"
+
+
+class EmbeddingStore(Embeddings):
+    """
+    Append-only, on-disk embedding store for ingestion runs.
+
+    Vectors live in one raw float32 file read through np.memmap; row i
+    belongs to the i-th text hash in keys.txt. Anything embedded once (the
+    SemanticChunker's sentence windows, chunk texts) is reused by later
+    calls and by later runs, and misses are embedded in large batches.
+    Single writer: meant for the ingest script, not the server.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, path: str, batch_size: int = 256):
+        self.base = base
+        self.model_name = model_name
+        self.path = path
+        self.batch_size = batch_size
+        self.computed = 0
+        self.reused = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._rows = {}
+        self._dim = None
+        self._mmap = None
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        meta_path = self._file(META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name:
+                print(f"⚠️  Embedding store at {self.path} was built with {meta.get('model')}, starting over")
+                for name in (VECTORS_FILE, KEYS_FILE, META_FILE):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+                return
+            self._dim = meta["dim"]
+
+        if self._dim is None or not os.path.exists(self._file(KEYS_FILE)) or not os.path.exists(self._file(VECTORS_FILE)):
+            return
+        # A crash between the two appends can leave a key without its vector: trust the shorter file
+        n_vectors = os.path.getsize(self._file(VECTORS_FILE)) // (4 * self._dim)
+        with open(self._file(KEYS_FILE), 'r', encoding='utf-8') as f:
+            keys = [line.strip() for line in f]
+        keys = keys[:n_vectors]
+        self._rows = {key: row for row, key in enumerate(keys)}
+        if len(keys) * 4 * self._dim != os.path.getsize(self._file(VECTORS_FILE)) or len(self._rows) != len(keys):
+            # Drop the torn tail so new rows line up with new keys
+            with open(self._file(VECTORS_FILE), 'r+b') as f:
+                f.truncate(len(keys) * 4 * self._dim)
+            with open(self._file(KEYS_FILE), 'w', encoding='utf-8') as f:
+                f.writelines(f"{k}\n" for k in keys)
+
+    def _key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+    def _vectors(self) -> np.ndarray:
+        if self._mmap is None or len(self._mmap) < len(self._rows):
+            self._mmap = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode='r', shape=(len(self._rows), self._dim))
+        return self._mmap
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+            with open(self._file(META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model_name, "dim": self._dim}, f)
+        # Vectors first, then keys: a key is only ever written after its vector
+        with open(self._file(VECTORS_FILE), 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._file(KEYS_FILE), 'a', encoding='utf-8') as f:
+            for key in keys:
+                self._rows[key] = len(self._rows)
+                f.write(f"{key}\n")
+
+    def get(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Stored vectors for `texts` (None where missing); never calls the model."""
+        rows = [self._rows.get(self._key(t)) for t in texts]
+        if all(r is None for r in rows):
+            return [None] * len(texts)
+        vectors = self._vectors()
+        return [None if r is None else np.asarray(vectors[r]) for r in rows]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        keys = [self._key(t) for t in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._rows and key not in missing:
+                missing[key] = text
+        self.reused += len(texts) - len(missing)
+
+        items = list(missing.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            computed = np.asarray(self.base.embed_documents([t for _, t in batch]), dtype=np.float32)
+            self._append([k for k, _ in batch], computed)
+            self.computed += len(batch)
+
+        vectors = self._vectors()
+        return [vectors[self._rows[k]].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
@@ -0,0 +1,99 @@
+# app/vectorstore/index_factory.py
+import math
+import uuid
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Defaults used when the manifest does not override them
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+PQ_NBITS = 8
+TRAIN_SAMPLE = 50000
+
+
+def _nlist(n: int) -> int:
+    # ~4*sqrt(n) lists, but keep >= 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+def _pq_m(dim: int) -> int:
+    for m in (64, 48, 32, 16, 8, 4, 2, 1):
+        if dim % m == 0:
+            return m
+    return 1
+
+def index_spec(index_type: str, n: int, dim: int) -> dict:
+    """
+    Resolve an index type into a FAISS factory string and search parameters.
+    Falls back to Flat when there are too few vectors to train the requested type.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type == "hnsw":
+        return {"type": "hnsw", "factory": f"HNSW{HNSW_M}", "search_params": {"efSearch": HNSW_EF_SEARCH}}
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _nlist(n)
+        min_train = 2 ** PQ_NBITS if index_type == "ivf_pq" else 39
+        if nlist < 2 or n < min_train:
+            print(f"⚠️  {n} vectors are too few to train {index_type}, using flat")
+            return index_spec("flat", n, dim)
+        coarse = f"IVF{nlist}"
+        suffix = "Flat" if index_type == "ivf_flat" else f"PQ{_pq_m(dim)}x{PQ_NBITS}"
+        return {
+            "type": index_type,
+            "factory": f"{coarse},{suffix}",
+            "search_params": {"nprobe": min(IVF_NPROBE, nlist)},
+        }
+
+    return {"type": "flat", "factory": "Flat", "search_params": {}}
+
+def build_index(vectors: np.ndarray, spec: dict, seed: int = 0) -> faiss.Index:
+    """Create, train (on a sample when needed) and fill a FAISS index for `spec`."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.index_factory(vectors.shape[1], spec["factory"], faiss.METRIC_L2)
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), TRAIN_SAMPLE)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    configure_index(index, spec)
+    return index
+
+def configure_index(index: faiss.Index, spec: dict):
+    """
+    Prepare a built or freshly loaded index for LangChain: set the query-time
+    knobs (nprobe / efSearch) recorded in the manifest and, for IVF indexes,
+    enable the direct map that MMR needs to reconstruct candidate vectors.
+    """
+    if spec.get("type") in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(index).make_direct_map()
+    space = faiss.ParameterSpace()
+    for name, value in (spec.get("search_params") or {}).items():
+        space.set_index_parameter(index, name, value)
+
+def build_vectorstore(docs, embeddings, index_type: str = "flat"):
+    """
+    Embed `docs` and wrap an index of the requested type in a LangChain FAISS store.
+
+    Returns (vectorstore, spec) so the caller can persist the spec in the manifest.
+    """
+    vectors = np.asarray(embeddings.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+    spec = index_spec(index_type, len(vectors), vectors.shape[1])
+    index = build_index(vectors, spec)
+
+    ids = [str(uuid.uuid4()) for _ in docs]
+    vectorstore = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, docs))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+    return vectorstore, spec
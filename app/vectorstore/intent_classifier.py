@@ -0,0 +1,68 @@
+# app/vectorstore/intent_classifier.py
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+from app.config import settings
+
+CENTROIDS_FILE = "intent_centroids.npz"
+
+INTENT_CLASSIFICATIONS = Counter(
+    'helpdesk_intent_classifications_total',
+    'Intent classifications by path taken',
+    ['path']  # local | llm_fallback | llm
+)
+
+
+class CentroidIntentClassifier:
+    """
+    Nearest-centroid intent classifier over query embeddings.
+
+    Centroids are built by scripts/train_intent_classifier.py from the chunk
+    vectors of each shard plus labelled example queries. predict() returns the
+    best label and its cosine margin over the runner-up; callers fall back to
+    the LLM when the margin is below INTENT_MARGIN_THRESHOLD.
+    """
+
+    def __init__(self, labels, centroids: np.ndarray):
+        self.labels = list(labels)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CentroidIntentClassifier"]:
+        if not os.path.exists(path):
+            return None
+        data = np.load(path, allow_pickle=False)
+        return cls([str(label) for label in data["labels"]], data["centroids"])
+
+    def save(self, path: str):
+        np.savez(path, labels=np.array(self.labels), centroids=self.centroids)
+
+    def predict(self, embedding) -> Tuple[str, float]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec = vec / norm
+        scores = self.centroids @ vec
+        order = np.argsort(scores)[::-1]
+        margin = float(scores[order[0]] - scores[order[1]]) if len(order) > 1 else 1.0
+        return self.labels[order[0]], margin
+
+    def classify(self, embedding, threshold: Optional[float] = None) -> Optional[str]:
+        """Return the label if the margin clears the threshold, else None (use the LLM)."""
+        threshold = settings.INTENT_MARGIN_THRESHOLD if threshold is None else threshold
+        label, margin = self.predict(embedding)
+        return label if margin >= threshold else None
+
+
+def build_centroids(vectors_by_label: dict) -> CentroidIntentClassifier:
+    """Normalized mean of the (normalized) vectors of each label."""
+    labels, centroids = [], []
+    for label, vectors in sorted(vectors_by_label.items()):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        centroid = vectors.mean(axis=0)
+        labels.append(label)
+        centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+    return CentroidIntentClassifier(labels, np.vstack(centroids))
@@ -1,7 +1,117 @@
 # app/vectorstore/load_vectorstore.py
+import json
+import os
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+from app.config import settings
+from app.vectorstore.cached_embeddings import CachedEmbeddings
+from app.vectorstore.index_factory import configure_index
+from app.vectorstore.docstore import load_mmap_store
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ShardedVectorStore:
+    """
+    One FAISS index per intent, routed by the intent resolved in classify_intent.
+
+    A persist_dir without a manifest (the original single-index layout) is
+    served as one shard for every intent, with the intent applied as a FAISS
+    metadata filter instead.
+    """
+
+    def __init__(self, shards: dict, embeddings, sharded: bool = True, version: str = ""):
+        self.shards = shards
+        self.embeddings = embeddings
+        self.sharded = sharded
+        # Identifies this build of the index; cached docstore ids are only valid for it
+        self.version = version
+
+    def for_intent(self, intent):
+        if not self.sharded:
+            return next(iter(self.shards.values()))
+        if intent in self.shards:
+            return self.shards[intent]
+        raise KeyError(f"No vectorstore shard for intent '{intent}'")
+
+    def as_retriever(self, intent, search_type="mmr", k=10, fetch_k=20):
+        search_kwargs = {"k": k, "fetch_k": max(fetch_k, k)}
+        if not self.sharded and intent:
+            search_kwargs["filter"] = {"intent": intent}
+        return self.for_intent(intent).as_retriever(search_type=search_type, search_kwargs=search_kwargs)
+
+    def search_candidates(self, embedding, k=10, fetch_k=20):
+        """
+        MMR candidate search on every shard for an already-computed query
+        embedding, before the intent is known. Returns {shard: docs}.
+        """
+        return {
+            name: shard.max_marginal_relevance_search_by_vector(embedding, k=k, fetch_k=max(fetch_k, k))
+            for name, shard in self.shards.items()
+        }
+
+    def candidates_for(self, candidates, intent):
+        """Pick the candidates matching the resolved intent out of search_candidates()."""
+        if self.sharded:
+            return candidates.get(intent, [])
+        docs = next(iter(candidates.values()), [])
+        return [d for d in docs if d.metadata.get("intent") == intent]
+
+    def get_documents(self, ids):
+        """Look chunks up by docstore id across every shard. Returns {id: Document}."""
+        found = {}
+        for shard in self.shards.values():
+            missing = [i for i in ids if i not in found]
+            if not missing:
+                break
+            docstore = shard.docstore
+            if hasattr(docstore, "mget"):
+                found.update(docstore.mget(missing))
+                continue
+            for doc_id in missing:
+                doc = docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    found[doc_id] = doc
+        return found
+
+
+def read_manifest(persist_dir):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _legacy_version(persist_dir):
+    # Indexes written before versioned manifests: fall back to the files' mtime
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        path = os.path.join(persist_dir, "index.faiss")
+    return f"mtime-{int(os.path.getmtime(path))}" if os.path.exists(path) else ""
+
+def load_embeddings(model_name="Qwen/Qwen3-Embedding-4B", redis_url=None):
+    """HuggingFace embeddings behind the LRU (+ optional Redis) embedding cache."""
+    base = HuggingFaceEmbeddings(model_name=model_name)
+    return CachedEmbeddings(base, model_name=model_name, redis_url=redis_url)
 
 def load_vectorstore(persist_dir, model_name="Qwen/Qwen3-Embedding-4B"):
-    embeddings = HuggingFaceEmbeddings(model_name=model_name)
-    return FAISS.load_local(persist_dir, embeddings, allow_dangerous_deserialization=True)
+    redis_url = settings.REDIS_URL if settings.EMBEDDING_CACHE_REDIS else None
+    embeddings = load_embeddings(model_name, redis_url=redis_url)
+
+    manifest = read_manifest(persist_dir)
+    if manifest is None:
+        index = FAISS.load_local(persist_dir, embeddings, allow_dangerous_deserialization=True)
+        return ShardedVectorStore({"*": index}, embeddings, sharded=False, version=_legacy_version(persist_dir))
+
+    shards = {}
+    for intent, info in manifest["shards"].items():
+        shard_dir = os.path.join(persist_dir, info["path"])
+        if info.get("format") == "mmap":
+            shard = load_mmap_store(shard_dir, embeddings, index_type=info.get("index", {}).get("type"))
+        else:
+            shard = FAISS.load_local(shard_dir, embeddings, allow_dangerous_deserialization=True)
+        # Index type (flat / hnsw / ivf_*) is recorded per shard at ingest time
+        configure_index(shard.index, info.get("index", {}))
+        shards[intent] = shard
+    return ShardedVectorStore(shards, embeddings, version=manifest.get("version") or _legacy_version(persist_dir))
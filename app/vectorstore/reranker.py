@@ -0,0 +1,169 @@
+# app/vectorstore/reranker.py
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import settings
+from app.utils.metrics import RETRIEVAL_LATENCY
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable identifier for a retrieved chunk (docstore id when known, else content hash)."""
+    if getattr(doc, "id", None):
+        return doc.id
+    return hashlib.sha256(doc.page_content.encode()).hexdigest()[:16]
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()[:16]
+
+
+class BatchingReranker:
+    """
+    Process-wide Flashrank cross-encoder.
+
+    The ONNX model and tokenizer are loaded once. Passages from concurrent
+    requests are queued and scored together in a single inference call per
+    small time window, and (query, chunk) scores are memoized so a reflection
+    re-retrieval never re-scores passages it has already seen.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        window_ms: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        memo_size: Optional[int] = None,
+    ):
+        self.model_name = model_name or settings.RERANK_MODEL
+        self.window = (window_ms if window_ms is not None else settings.RERANK_BATCH_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.RERANK_MAX_BATCH
+        self.memo_size = memo_size or settings.RERANK_MEMO_SIZE
+
+        self._ranker = None
+        self._load_lock = threading.Lock()
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    # -----------------------------
+    # Model + batching worker
+    # -----------------------------
+    def _ensure_started(self):
+        if self._worker is not None:
+            return
+        with self._load_lock:
+            if self._worker is not None:
+                return
+            from flashrank import Ranker
+            self._ranker = Ranker(model_name=self.model_name) if self.model_name else Ranker()
+            self._worker = threading.Thread(target=self._run, name="helpdesk-reranker", daemon=True)
+            self._worker.start()
+
+    def _score_pairs(self, pairs: List[List[str]]) -> np.ndarray:
+        """Cross-encoder scores for [query, passage] pairs (same math as Ranker.rerank)."""
+        encoded = self._ranker.tokenizer.encode_batch(pairs)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        token_type_ids = np.array([e.type_ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+
+        onnx_input = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if not np.all(token_type_ids == 0):
+            onnx_input["token_type_ids"] = token_type_ids
+
+        logits = self._ranker.session.run(None, onnx_input)[0]
+        if logits.shape[1] == 1:
+            return 1 / (1 + np.exp(-logits.flatten()))
+        exp_logits = np.exp(logits)
+        return exp_logits[:, 1] / np.sum(exp_logits, axis=1)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            # Collect whatever else arrives within the batching window
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            pairs = [pair for item_pairs, _ in batch for pair in item_pairs]
+            try:
+                scores = self._score_pairs(pairs)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_pairs, future in batch:
+                future.set_result(scores[offset:offset + len(item_pairs)])
+                offset += len(item_pairs)
+
+    # -----------------------------
+    # Score memo
+    # -----------------------------
+    def _memo_get(self, key):
+        with self._memo_lock:
+            score = self._memo.get(key)
+            if score is not None:
+                self._memo.move_to_end(key)
+            return score
+
+    def _memo_put(self, key, score: float):
+        with self._memo_lock:
+            self._memo[key] = score
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def score(self, query: str, docs: List[Document]) -> List[float]:
+        qh = query_hash(query)
+        keys = [(qh, chunk_id(d)) for d in docs]
+        scores = [self._memo_get(k) for k in keys]
+        missing = [i for i, s in enumerate(scores) if s is None]
+
+        if missing:
+            self._ensure_started()
+            future = Future()
+            self._queue.put(([[query, docs[i].page_content] for i in missing], future))
+            for i, s in zip(missing, future.result()):
+                scores[i] = float(s)
+                self._memo_put(keys[i], scores[i])
+        return scores
+
+    def rerank(self, query: str, docs: List[Document], top_n: Optional[int] = None) -> List[Document]:
+        """Return the top_n docs by cross-encoder score with metadata['relevance_score'] set."""
+        if not docs:
+            return []
+        top_n = top_n or settings.RERANK_TOP_N
+        with RETRIEVAL_LATENCY.labels(stage="rerank").time():
+            scores = self.score(query, docs)
+        ranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)[:top_n]
+        return [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "relevance_score": score},
+                id=getattr(doc, "id", None),
+            )
+            for doc, score in ranked
+        ]
+
+
+reranker = BatchingReranker()
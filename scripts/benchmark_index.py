@@ -0,0 +1,127 @@
+"""Benchmark FAISS index types (flat, hnsw, ivf_flat, ivf_pq): recall@k against Flat, query latency, disk size and serving memory."""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.vectorstore.index_factory import INDEX_TYPES, index_spec, build_index, configure_index
+from app.vectorstore.docstore import INDEX_FILE, save_mmap_shard, load_mmap_store
+
+
+def load_corpus_vectors(index_path: str) -> np.ndarray:
+    """Read every vector back out of an existing (flat) index.faiss."""
+    index = faiss.read_index(index_path)
+    return index.reconstruct_n(0, index.ntotal)
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors, a rough stand-in for real chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 100), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=n)
+    return centers[labels] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+
+def sample_queries(vectors: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus vectors, so each query has a meaningful neighbourhood."""
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)]
+    noise = 0.05 * picks.std() * rng.normal(size=picks.shape)
+    return np.ascontiguousarray(picks + noise, dtype=np.float32)
+
+def _serving_rss(persist_dir: str, spec: dict, query: np.ndarray, k: int) -> int:
+    """RSS growth of a fresh process that opens the shard like the server and runs one search."""
+    process = psutil.Process()
+    before = process.memory_info().rss
+    vs = load_mmap_store(persist_dir, None, index_type=spec["type"])
+    configure_index(vs.index, spec)
+    vs.index.search(query.reshape(1, -1), k)
+    return process.memory_info().rss - before
+
+def index_footprint(index: faiss.Index, spec: dict, query: np.ndarray, k: int) -> tuple:
+    """
+    (on-disk bytes, resident bytes when served): the index is saved as a shard
+    and loaded with mmap in a spawned process, so the second number covers
+    what load_mmap_store actually pages in (plus the IVF direct map, HNSW
+    links) rather than the serialized size.
+    """
+    persist_dir = tempfile.mkdtemp(prefix="bench_index_")
+    try:
+        save_mmap_shard(index, [], persist_dir)
+        disk = os.path.getsize(os.path.join(persist_dir, INDEX_FILE))
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            rss = pool.apply(_serving_rss, (persist_dir, spec, query, k))
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+    return disk, rss
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, index_types) -> list:
+    dim = vectors.shape[1]
+    truth = None
+    rows = []
+    for index_type in ["flat"] + [t for t in index_types if t != "flat"]:
+        spec = index_spec(index_type, len(vectors), dim)
+        start = time.perf_counter()
+        index = build_index(vectors, spec)
+        build_s = time.perf_counter() - start
+
+        latencies = []
+        results = []
+        for q in queries:
+            t0 = time.perf_counter()
+            _, ids = index.search(q.reshape(1, -1), k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            results.append(ids[0])
+        results = np.array(results)
+
+        if truth is None:
+            truth = results
+        recall = np.mean([
+            len(set(r[r >= 0]) & set(t[t >= 0])) / max(1, len(t[t >= 0]))
+            for r, t in zip(results, truth)
+        ])
+        disk, rss = index_footprint(index, spec, queries[0], k)
+        rows.append({
+            "type": index_type,
+            "factory": spec["factory"],
+            "build_s": build_s,
+            f"recall@{k}": recall,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "disk_mb": disk / 1e6,
+            "mmap_rss_mb": rss / 1e6,
+        })
+    return rows
+
+def print_table(rows: list):
+    headers = list(rows[0].keys())
+    print(" | ".join(f"{h:>14}" for h in headers))
+    for row in rows:
+        cells = [f"{v:>14.3f}" if isinstance(v, float) else f"{str(v):>14}" for v in row.values()]
+        print(" | ".join(cells))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index", help="Existing flat index.faiss to take corpus vectors from")
+    parser.add_argument("--synthetic", type=int, default=100000, help="Number of synthetic vectors when --index is not given")
+    parser.add_argument("--dim", type=int, default=2560, help="Dimension of synthetic vectors (Qwen3-Embedding-4B: 2560)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    if args.index:
+        vectors = load_corpus_vectors(args.index)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    print(f"📊 {len(vectors)} vectors, dim={vectors.shape[1]}, {args.queries} queries, k={args.k}")
+
+    queries = sample_queries(vectors, args.queries)
+    print_table(benchmark(vectors, queries, args.k, args.types))
@@ -0,0 +1,149 @@
+"""Offline comparison of the multi-call (generate -> evaluate) and single-call (generate+judge) modes: latency and agreement with the current evaluator."""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import stub_ollama
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "intent_examples.jsonl")
+
+
+def load_queries(path: str, limit: int = None) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return rows[:limit] if limit else rows
+
+def _ms(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "mean": None}
+    arr = np.asarray(values) * 1000
+    return {"p50": float(np.percentile(arr, 50)), "p95": float(np.percentile(arr, 95)), "mean": float(arr.mean())}
+
+def compare(rows: list) -> dict:
+    """
+    Per query: retrieve once (labelled intent when present), then
+      multi  = generate_answer + evaluate_once            (2 LLM calls)
+      single = judge_once                                  (1 LLM call)
+      check  = evaluate_once on the single-call answer     (the current evaluator's verdict on it)
+    No reflection in either mode, so both see exactly the same documents.
+    """
+    from app.original.langraph_pipeline_typed_original import PipelineState
+    from app.pipeline.nodes.intent_node import classify_intent
+    from app.pipeline.nodes.retrieve_node import FIRST_PASS_K, retrieve_docs
+    from app.pipeline.nodes.generate_node import generate_answer
+    from app.pipeline.nodes.evaluate_node import evaluate_once
+    from app.pipeline.nodes.reflection import reflection_decision
+    from app.pipeline.nodes.judge_node import judge_once
+
+    records = []
+    for i, row in enumerate(rows, 1):
+        state = PipelineState(user_query=row["query"], intent=row.get("intent"))
+        if state.intent is None:
+            state = classify_intent(state)
+        # override_k bypasses the retrieval cache: every query is searched and reranked
+        state = retrieve_docs(state, override_k=FIRST_PASS_K)
+
+        start = time.perf_counter()
+        multi = evaluate_once(generate_answer(state.model_copy()))
+        multi_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        single = judge_once(state.model_copy())
+        single_s = time.perf_counter() - start
+
+        check = evaluate_once(single.model_copy())
+
+        records.append({
+            "query": row["query"],
+            "multi_s": multi_s,
+            "single_s": single_s,
+            "multi": {"sufficient": multi.eval_sufficient, "confidence": multi.eval_confidence,
+                      "reflect": reflection_decision(multi) == "triggered"},
+            "single": {"sufficient": single.eval_sufficient, "confidence": single.eval_confidence,
+                       "reflect": reflection_decision(single) == "triggered", "cited": single.cited_chunks},
+            "evaluator_on_single": {"sufficient": check.eval_sufficient, "confidence": check.eval_confidence},
+        })
+        print(f"  [{i}/{len(rows)}] multi {multi_s * 1000:7.0f} ms | single {single_s * 1000:7.0f} ms | {row['query'][:60]}")
+    return summarize(records)
+
+def summarize(records: list) -> dict:
+    def rate(pred) -> float:
+        return float(np.mean([pred(r) for r in records])) if records else 0.0
+
+    conf_gap = [
+        abs(r["single"]["confidence"] - r["evaluator_on_single"]["confidence"])
+        for r in records
+        if r["single"]["confidence"] is not None and r["evaluator_on_single"]["confidence"] is not None
+    ]
+    return {
+        "queries": len(records),
+        "latency_ms": {"multi": _ms([r["multi_s"] for r in records]), "single": _ms([r["single_s"] for r in records])},
+        "llm_calls_per_query": {"multi": 2, "single": 1},
+        # Does the single call's self-assessment agree with the current evaluator on the same answer?
+        "self_vs_evaluator_sufficient": rate(lambda r: r["single"]["sufficient"] == r["evaluator_on_single"]["sufficient"]),
+        "self_vs_evaluator_confidence_mae": float(np.mean(conf_gap)) if conf_gap else None,
+        # Would the two modes take the same decision (answer vs escalate, reflect or not)?
+        "mode_sufficient_agreement": rate(lambda r: r["single"]["sufficient"] == r["multi"]["sufficient"]),
+        "mode_reflection_agreement": rate(lambda r: r["single"]["reflect"] == r["multi"]["reflect"]),
+        "sufficient_rate": {"multi": rate(lambda r: bool(r["multi"]["sufficient"])),
+                            "single": rate(lambda r: bool(r["single"]["sufficient"]))},
+        "cited_rate": rate(lambda r: bool(r["single"]["cited"])),
+        "records": records,
+    }
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:8.1f}"
+
+def report(summary: dict):
+    print(f"\n📊 {summary['queries']} queries")
+    print(f"\n{'mode':<10}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'sufficient':>12}")
+    for mode in ("multi", "single"):
+        lat = summary["latency_ms"][mode]
+        print(f"{mode:<10}{summary['llm_calls_per_query'][mode]:>7}  {_fmt(lat['p50'])}  {_fmt(lat['p95'])}  {_fmt(lat['mean'])}"
+              f"{summary['sufficient_rate'][mode]:>11.0%}")
+    mae = summary["self_vs_evaluator_confidence_mae"]
+    print(f"\n🤝 Self-assessment vs current evaluator (same answer): sufficient agree {summary['self_vs_evaluator_sufficient']:.0%}, "
+          f"confidence MAE {'-' if mae is None else f'{mae:.3f}'}")
+    print(f"🔀 Mode agreement: sufficient {summary['mode_sufficient_agreement']:.0%}, "
+          f"reflection decision {summary['mode_reflection_agreement']:.0%}")
+    print(f"📎 Single-call answers citing at least one passage: {summary['cited_rate']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="jsonl with 'query' (and optionally 'intent') per line")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--stub", action="store_true", help="run against the stub Ollama (dry run of the harness)")
+    parser.add_argument("--latency", default="", help="stub latency per purpose, e.g. generate=800,evaluate=300,generate_judge=900")
+    parser.add_argument("--json", default=None, help="write the summary (with per-query records) here")
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        stub = stub_ollama.serve(port=0, config=stub_ollama.StubConfig(stub_ollama.parse_latency(args.latency)), background=True)
+        # Must be set before app.llm creates its ChatOllama clients
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{stub.server_port}"
+        print(f"🧪 Stub Ollama on {os.environ['OLLAMA_HOST']}")
+
+    rows = load_queries(args.queries, args.limit)
+    print(f"🔎 Comparing modes on {len(rows)} queries from {args.queries}")
+    try:
+        summary = compare(rows)
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+    report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
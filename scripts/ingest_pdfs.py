@@ -1,12 +1,30 @@
-"""Ingest PDFs, add metadata 'filename' and 'intent' (heuristic), split using semantic chunking, and build FAISS index."""
+"""Ingest PDFs, add metadata 'filename' and 'intent' (heuristic), split using semantic chunking, and build one FAISS index per intent."""
+import hashlib
+import json
+import multiprocessing
 import os
-from langchain_community.document_loaders import UnstructuredFileLoader
-from langchain_experimental.text_splitter import SemanticChunker
+import re
+import shutil
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from langchain_experimental.text_splitter import SemanticChunker, combine_sentences
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.vectorstore.embedding_store import EmbeddingStore
+from app.vectorstore.load_vectorstore import MANIFEST_FILE, read_manifest
+from app.vectorstore.index_factory import INDEX_TYPES, index_spec, build_index, configure_index
+from app.vectorstore.docstore import INDEX_FILE, save_mmap_shard, save_mmap_store, load_editable_store
+
 os.environ["OCR_AGENT"] = "unstructured.partition.utils.ocr_models.tesseract_ocr.OCRAgentTesseract"
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.md', '.txt')
+EMBED_BATCH_SIZE = 256
+
 def guess_intent_from_filename(filename: str):
     """
     Heuristic to guess document intent from filename.
@@ -20,110 +38,473 @@ def guess_intent_from_filename(filename: str):
     return 'HR_Policy'
 
 
+# -----------------------------
+# On-disk stage
+#
+# {stage}/partition/{key}.json   documents produced by the (slow) partitioner
+# {stage}/embed/{key}.jsonl      chunks of that file
+# {stage}/embed/{key}.npy        their vectors, row-aligned with the jsonl
+# `key` hashes the file name and content, so an interrupted run resumes from
+# the first file without output and a changed file is simply re-processed.
+# -----------------------------
+def file_key(path: str) -> str:
+    # The name is part of the key: filename/source/intent metadata derive from it
+    h = hashlib.sha256(os.path.basename(path).encode() + b"\0")
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()[:24]
+
+def _write_atomic(path: str, write):
+    """Write via a temp file + rename so a crash never leaves a truncated file."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+def _partition_path(stage_dir: str, key: str) -> str:
+    return os.path.join(stage_dir, "partition", f"{key}.json")
+
+def _embed_paths(stage_dir: str, key: str):
+    base = os.path.join(stage_dir, "embed", key)
+    return f"{base}.jsonl", f"{base}.npy"
+
+def _init_worker():
+    # One OCR/layout thread per process; parallelism comes from the pool
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+def partition_file(path: str, key: str, stage_dir: str) -> int:
+    """Load one file (hi_res layout + OCR for PDFs) and stage its documents. Runs in a worker process."""
+    filename = os.path.basename(path)
+    if filename.lower().endswith('.pdf'):
+        from langchain_community.document_loaders import UnstructuredFileLoader
+        loader = UnstructuredFileLoader(path, unstructured_kwargs={'strategy': 'hi_res'})
+        docs = loader.load()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            docs = [Document(page_content=f.read(), metadata={})]
+
+    staged = []
+    for d in docs:
+        metadata = dict(d.metadata)
+        metadata['filename'] = filename.replace('.pdf', '').replace('.md', '').replace('.txt', '')
+        metadata['source'] = path  # Full path for reference
+        metadata['intent'] = guess_intent_from_filename(filename)
+        staged.append({"page_content": d.page_content, "metadata": metadata})
+
+    data = json.dumps(staged, default=str).encode('utf-8')
+    _write_atomic(_partition_path(stage_dir, key), lambda f: f.write(data))
+    return len(staged)
+
+def load_partition(stage_dir: str, key: str) -> list:
+    with open(_partition_path(stage_dir, key), 'r', encoding='utf-8') as f:
+        return [Document(**d) for d in json.load(f)]
+
+def _sentence_groups(chunker, text: str, chunks: list):
+    """
+    Sentence-window texts the chunker embedded for each chunk of `text`, or
+    None for a chunk that can't be mapped back (the chunker didn't embed it).
+    """
+    sentences = re.split(chunker.sentence_split_regex, text)
+    if len(sentences) == 1 or (chunker.breakpoint_threshold_type == "gradient" and len(sentences) == 2):
+        return [None] * len(chunks)
+    windows = [
+        s["combined_sentence"]
+        for s in combine_sentences([{"sentence": x, "index": i} for i, x in enumerate(sentences)], chunker.buffer_size)
+    ]
+
+    # Chunks are consecutive runs of sentences joined with " "
+    groups, pos = [], 0
+    for chunk in chunks:
+        start = pos
+        while pos < len(sentences):
+            pos += 1
+            if " ".join(sentences[start:pos]) == chunk:
+                break
+        else:
+            return groups + [None] * (len(chunks) - len(groups))
+        groups.append(windows[start:pos])
+    return groups
+
+def _pool(vectors: list) -> np.ndarray:
+    # Mean of the window vectors, rescaled to their average norm (normalized models stay unit length)
+    stacked = np.asarray(vectors, dtype=np.float32)
+    mean = stacked.mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return mean * (np.linalg.norm(stacked, axis=1).mean() / norm) if norm else mean
+
+def embed_file(key: str, stage_dir: str, chunker, store, pool: bool = True) -> dict:
+    """
+    Chunk one staged file and stage its chunks + vectors. With `pool`, a
+    chunk's vector is the pooled embedding of the sentence windows the
+    chunker already computed; only chunks that can't be pooled are embedded.
+    """
+    chunks, vectors = [], []
+    for doc in load_partition(stage_dir, key):
+        # Split the document content semantically, keeping the original metadata
+        doc_chunks = chunker.create_documents([doc.page_content])
+        groups = _sentence_groups(chunker, doc.page_content, [c.page_content for c in doc_chunks]) if pool else [None] * len(doc_chunks)
+        for chunk, group in zip(doc_chunks, groups):
+            chunk.metadata.update(doc.metadata)
+            chunks.append(chunk)
+            window_vectors = store.get(group) if group else [None]
+            vectors.append(_pool(window_vectors) if all(v is not None for v in window_vectors) else None)
+
+    pooled = sum(v is not None for v in vectors)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        # EmbeddingStore batches the misses and reuses anything seen before
+        for i, vec in zip(missing, store.embed_documents([chunks[i].page_content for i in missing])):
+            vectors[i] = vec
+
+    chunks_path, vectors_path = _embed_paths(stage_dir, key)
+    # Vectors first: a file only counts as embedded once its chunks file exists
+    _write_atomic(vectors_path, lambda f: np.save(f, np.asarray(vectors, dtype=np.float32)))
+    rows = "".join(json.dumps({"page_content": c.page_content, "metadata": c.metadata}, default=str) + "\n" for c in chunks)
+    _write_atomic(chunks_path, lambda f: f.write(rows.encode('utf-8')))
+    return {"chunks": len(chunks), "pooled": pooled}
+
+def _is_embedded(stage_dir: str, key: str) -> bool:
+    return all(os.path.exists(p) for p in _embed_paths(stage_dir, key))
+
+def chunk_ids(key: str, n: int) -> list:
+    """Docstore ids of a file's chunks: stable for as long as the file is unchanged."""
+    return [f"{key}-{i}" for i in range(n)]
+
+def _read_chunks(stage_dir: str, keys):
+    """(chunk id, Document) for every staged chunk of `keys`, in order."""
+    for key in keys:
+        chunks_path, _ = _embed_paths(stage_dir, key)
+        with open(chunks_path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                yield f"{key}-{i}", Document(**json.loads(line))
+
+def _read_vectors(stage_dir: str, keys) -> np.ndarray:
+    arrays = [np.load(_embed_paths(stage_dir, key)[1], mmap_mode='r') for key in keys]
+    arrays = [a for a in arrays if len(a)]
+    return np.concatenate(arrays) if arrays else np.zeros((0, 0), dtype=np.float32)
+
+
+# -----------------------------
+# Shard building / in-place updates
+# -----------------------------
+def _shard_dir(intent: str, version: str) -> str:
+    # Every build writes new shard directories; the manifest switch is the commit point
+    return f"{intent}-{version}"
+
+def build_shard(stage_dir: str, keys: list, index_type: str, shard_path: str):
+    """New shard from staged vectors; chunk texts stream straight into the SQLite docstore."""
+    vectors = _read_vectors(stage_dir, keys)
+    if not len(vectors):
+        return None
+    spec = index_spec(index_type, len(vectors), vectors.shape[1])
+    index = build_index(vectors, spec)
+    rows = ((pos, chunk_id, chunk) for pos, (chunk_id, chunk) in enumerate(_read_chunks(stage_dir, keys)))
+    save_mmap_shard(index, rows, shard_path)
+    return spec, len(vectors)
+
+def update_shard(stage_dir: str, old_path: str, spec: dict, remove_ids: list, add_keys: list, embeddings, shard_path: str):
+    """
+    Apply deletes and additions to an existing shard with FAISS delete /
+    add_embeddings and save it to `shard_path`. Only flat shards support
+    that delete: HNSW can't remove vectors and IVF removal breaks both the
+    direct map and LangChain's position renumbering. For those, the kept
+    vectors are reconstructed and the index is retrained and rebuilt.
+    """
+    vs = load_editable_store(old_path, embeddings)
+    new_chunks = list(_read_chunks(stage_dir, add_keys))
+    new_vectors = _read_vectors(stage_dir, add_keys)
+
+    if remove_ids and spec.get("type", "flat") != "flat":
+        # IVF reconstruct() needs the direct map
+        configure_index(vs.index, spec)
+        removed = set(remove_ids)
+        kept = [(pos, doc_id) for pos, doc_id in sorted(vs.index_to_docstore_id.items()) if doc_id not in removed]
+        vectors = [vs.index.reconstruct(int(pos)) for pos, _ in kept]
+        if len(new_vectors):
+            vectors.extend(new_vectors)
+        if not vectors:
+            return None
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if spec["type"] != "hnsw":
+            # Re-size the coarse quantizer for the new vector count (or fall back to flat)
+            spec = index_spec(spec["type"], len(vectors), vectors.shape[1])
+        index = build_index(vectors, spec)
+        rows = [(doc_id, vs.docstore.search(doc_id)) for _, doc_id in kept] + new_chunks
+        save_mmap_shard(index, ((pos, doc_id, doc) for pos, (doc_id, doc) in enumerate(rows)), shard_path)
+        return spec, len(rows)
+
+    if remove_ids:
+        vs.delete(remove_ids)
+    if new_chunks:
+        vs.add_embeddings(
+            [(c.page_content, v.tolist()) for (_, c), v in zip(new_chunks, new_vectors)],
+            metadatas=[c.metadata for _, c in new_chunks],
+            ids=[chunk_id for chunk_id, _ in new_chunks],
+        )
+    if not vs.index.ntotal:
+        return None
+    save_mmap_store(vs, shard_path)
+    return spec, vs.index.ntotal
+
+def _prune_shard_dirs(persist_path: str, *manifests):
+    """
+    Remove shard directories no manifest refers to. The previous generation
+    is kept so workers still serving it can open its docstore until restart.
+    """
+    live = {info["path"] for m in manifests if m for info in m.get("shards", {}).values()}
+    for name in os.listdir(persist_path):
+        path = os.path.join(persist_path, name)
+        if name not in live and os.path.exists(os.path.join(path, INDEX_FILE)):
+            shutil.rmtree(path)
+
+
 def ingest_folder(
-    folder_path: str, 
+    folder_path: str,
     persist_path: str,
     embedding_model: str = "Qwen/Qwen3-Embedding-4B",
-    breakpoint_threshold_type: str = "percentile"
+    breakpoint_threshold_type: str = "percentile",
+    index_type: str = "flat",
+    workers: int = None,
+    stage_path: str = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    rebuild: bool = False,
+    pool: bool = True,
 ):
     """
-    Ingest documents from folder, chunk them semantically, and create FAISS vector store.
-    
+    Ingest documents from folder, chunk them semantically, and create one FAISS shard per intent
+    plus a manifest.json describing them.
+
+    Files are partitioned in a process pool and staged on disk; each file is
+    chunked and embedded (in batches) as soon as its partition is ready, so
+    OCR and embedding overlap and a crashed run resumes where it stopped.
+
+    The manifest records every file's content hash and chunk ids. A later run
+    only processes added and modified files and applies the changes to the
+    existing shards in place; deleted files' chunks are removed. Shards are
+    written to new directories and the manifest is replaced atomically, so a
+    reader never sees a half-updated index.
+
     Args:
         folder_path: Path to folder containing documents (e.g., 'data/references')
         persist_path: Where to save the FAISS index (e.g., 'data/vector_db')
         embedding_model: HuggingFace embedding model name
         breakpoint_threshold_type: Threshold type for semantic chunking
-    
+        index_type: FAISS index type, one of INDEX_TYPES (flat, hnsw, ivf_flat, ivf_pq)
+        workers: Partitioning processes (default: CPU count)
+        stage_path: Intermediate results directory (default: '<persist_path>.stage')
+        batch_size: Texts per embedding call
+        rebuild: Ignore the existing manifest and rebuild every shard
+        pool: Derive chunk vectors from the chunker's sentence-window embeddings
+            instead of embedding every chunk again
+
     Returns:
-        FAISS vectorstore object
+        The manifest written to persist_path
     """
-    
-    # Step 1: Load all documents
+
+    # Step 1: Find documents and diff them against the manifest
     print(f"📂 Loading documents from: {folder_path}")
-    all_docs = []
-    
     if not os.path.exists(folder_path):
         raise FileNotFoundError(f"Folder not found: {folder_path}")
-    
-    for file in os.listdir(folder_path):
-        file_lower = file.lower()
-        
-        if file_lower.endswith(('.pdf', '.md', '.txt')):
-            path = os.path.join(folder_path, file)
-            print(f"📄 Loading: {path}")
-            
-            # Load PDF with hi_res strategy
-            if file_lower.endswith('.pdf'):
-                loader = UnstructuredFileLoader(
-                    path, 
-                    unstructured_kwargs={'strategy': 'hi_res'}
-                )
-                docs = loader.load()
-            
-            # Load markdown/text files
-            else:
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    docs = [Document(page_content=content, metadata={})]
-            
-            # Add metadata to each document
-            for d in docs:
-                d.metadata['filename'] = file.replace('.pdf', '').replace('.md', '').replace('.txt', '')
-                d.metadata['source'] = path  # Full path for reference
-                d.metadata['intent'] = guess_intent_from_filename(file)
-            
-            all_docs.extend(docs)
-    
-    if not all_docs:
+
+    files = sorted(
+        os.path.join(folder_path, f) for f in os.listdir(folder_path)
+        if f.lower().endswith(SUPPORTED_EXTENSIONS)
+    )
+    if not files:
         raise ValueError(f"No documents found in {folder_path}")
-    
-    print(f"✅ Loaded {len(all_docs)} documents")
-    
+
+    keys = {path: file_key(path) for path in files}
+    names = {path: os.path.basename(path) for path in files}
+
+    previous = read_manifest(persist_path)
+    old_files = None
+    if (
+        not rebuild and previous and "files" in previous
+        and previous.get("embedding_model") == embedding_model
+        and previous.get("index_type") == index_type
+    ):
+        old_files = previous["files"]
+
+    if old_files is None:
+        changed, deleted = files, []
+        unchanged = []
+    else:
+        changed = [p for p in files if old_files.get(names[p], {}).get("hash") != keys[p]]
+        unchanged = [p for p in files if p not in changed]
+        current = set(names.values())
+        deleted = [name for name in old_files if name not in current]
+        added = [p for p in changed if names[p] not in old_files]
+        print(f"🔍 {len(unchanged)} unchanged, {len(added)} added, "
+              f"{len(changed) - len(added)} modified, {len(deleted)} deleted")
+        if not changed and not deleted:
+            print("✅ Index is up to date, nothing to do")
+            return previous
+
+    stage_dir = stage_path or f"{persist_path.rstrip(os.sep)}.stage"
+    os.makedirs(os.path.join(stage_dir, "partition"), exist_ok=True)
+    os.makedirs(os.path.join(stage_dir, "embed"), exist_ok=True)
+
+    to_partition = [p for p in changed if not os.path.exists(_partition_path(stage_dir, keys[p]))]
+    to_embed = [p for p in changed if not _is_embedded(stage_dir, keys[p])]
+    print(f"✅ {len(changed)} documents to index ({len(changed) - len(to_embed)} already embedded, "
+          f"{len(to_partition)} to partition)")
+
     # Step 2: Initialize embeddings
     print(f"🔧 Initializing embeddings: {embedding_model}")
-    embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
-    
-    # Step 3: Semantic chunking
+    # On-disk store shared by the chunker and chunk embedding, and across runs.
+    # Replaces the CachedEmbeddings LRU ingest used before (the server still uses that one)
+    embeddings = EmbeddingStore(
+        HuggingFaceEmbeddings(model_name=embedding_model),
+        model_name=embedding_model,
+        path=os.path.join(stage_dir, "embeddings"),
+        batch_size=batch_size,
+    )
     print(f"✂️  Using SemanticChunker with breakpoint_threshold_type='{breakpoint_threshold_type}'")
     semantic_chunker = SemanticChunker(
-        embeddings, 
+        embeddings,
         breakpoint_threshold_type=breakpoint_threshold_type
     )
-    
-    # Create chunks while preserving metadata
-    chunks = []
-    for doc in all_docs:
-        # Split the document content semantically
-        doc_chunks = semantic_chunker.create_documents([doc.page_content])
-        
-        # Add original metadata to each chunk
-        for chunk in doc_chunks:
-            chunk.metadata.update(doc.metadata)
-        
-        chunks.extend(doc_chunks)
-    
-    print(f"✅ Created {len(chunks)} semantic chunks")
-    
-    # Step 4: Create FAISS vector store
-    print("🔨 Building FAISS index...")
-    vectorstore = FAISS.from_documents(chunks, embeddings)
-    
-    # Step 5: Save to disk
+
+    # Step 3: Partition in parallel; chunk + embed each file as its partition lands
+    embedded_chunks = pooled_chunks = 0
+
+    def _embed(path):
+        nonlocal embedded_chunks, pooled_chunks
+        stats = embed_file(keys[path], stage_dir, semantic_chunker, embeddings, pool=pool)
+        embedded_chunks += stats["chunks"]
+        pooled_chunks += stats["pooled"]
+        print(f"🧮 Embedded {names[path]}: {stats['chunks']} chunks ({stats['pooled']} pooled)")
+
+    pending = set(to_embed)
+    for path in [p for p in to_embed if p not in to_partition]:
+        _embed(path)
+        pending.discard(path)
+
+    if to_partition:
+        # spawn, not fork: this process has already started torch/OpenMP threads for the embedding model
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_init_worker,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = {executor.submit(partition_file, p, keys[p], stage_dir): p for p in to_partition}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    n = future.result()
+                except Exception as e:
+                    # Leave it unstaged; the next run retries just this file
+                    print(f"❌ Failed to load {path}: {e}")
+                    pending.discard(path)
+                    continue
+                print(f"📄 Loaded {names[path]}: {n} documents")
+                if path in pending:
+                    _embed(path)
+                    pending.discard(path)
+
+    failed = [p for p in changed if not _is_embedded(stage_dir, keys[p])]
+    if failed:
+        raise RuntimeError(f"{len(failed)} documents failed; re-run to resume")
+
+    # Step 4: Work out per-intent changes
+    files_entry = {} if old_files is None else {
+        names[p]: old_files[names[p]] for p in unchanged
+    }
+    add_keys, remove_ids = {}, {}
+    for path in changed:
+        intent = guess_intent_from_filename(names[path])
+        n = len(np.load(_embed_paths(stage_dir, keys[path])[1], mmap_mode='r'))
+        files_entry[names[path]] = {"hash": keys[path], "intent": intent, "chunk_ids": chunk_ids(keys[path], n)}
+        add_keys.setdefault(intent, []).append(keys[path])
+        if old_files and names[path] in old_files:
+            old = old_files[names[path]]
+            remove_ids.setdefault(old["intent"], []).extend(old["chunk_ids"])
+    for name in deleted:
+        old = old_files[name]
+        remove_ids.setdefault(old["intent"], []).extend(old["chunk_ids"])
+
+    # Step 5: Build new shards / update changed ones (mmap-able index + SQLite docstore, no pickle)
+    version = uuid.uuid4().hex[:12]
+    # A new version invalidates retrieval cache entries that point at the old chunk ids
+    manifest = {
+        "embedding_model": embedding_model,
+        "index_type": index_type,
+        "version": version,
+        "shards": {},
+        "files": dict(sorted(files_entry.items())),
+    }
+    old_shards = (previous or {}).get("shards", {}) if old_files is not None else {}
     os.makedirs(persist_path, exist_ok=True)
-    vectorstore.save_local(persist_path)
-    print(f"💾 Saved vectorstore to {persist_path}")
-    print(f"📊 Total chunks indexed: {len(chunks)}")
-    
-    return vectorstore
+    reused = updated = 0
+
+    for intent in sorted(set(old_shards) | set(add_keys)):
+        adds, removes = add_keys.get(intent, []), remove_ids.get(intent, [])
+        shard_path = os.path.join(persist_path, _shard_dir(intent, version))
+        if intent in old_shards and not adds and not removes:
+            manifest["shards"][intent] = old_shards[intent]
+            reused += 1
+            continue
+        if intent in old_shards:
+            print(f"🔧 Updating FAISS shard '{intent}' (+{len(adds)} files, -{len(removes)} chunks)...")
+            old = old_shards[intent]
+            result = update_shard(
+                stage_dir, os.path.join(persist_path, old["path"]), old.get("index", {}),
+                removes, adds, embeddings, shard_path,
+            )
+            updated += 1
+        else:
+            print(f"🔨 Building {index_type} FAISS shard '{intent}'...")
+            result = build_shard(stage_dir, adds, index_type, shard_path)
+        if result is None:
+            print(f"🗑️  Shard '{intent}' is empty, dropping it")
+            continue
+        spec, n = result
+        manifest["shards"][intent] = {
+            "path": _shard_dir(intent, version),
+            "format": "mmap",
+            "chunks": n,
+            "index": spec,
+        }
+
+    data = json.dumps(manifest, indent=2).encode('utf-8')
+    _write_atomic(os.path.join(persist_path, MANIFEST_FILE), lambda f: f.write(data))
+    _prune_shard_dirs(persist_path, manifest, previous)
+
+    total = sum(info["chunks"] for info in manifest["shards"].values())
+    reused_chunks = sum(len(files_entry[names[p]]["chunk_ids"]) for p in unchanged)
+    print(f"💾 Saved {len(manifest['shards'])} vectorstore shards to {persist_path} "
+          f"({reused} untouched, {updated} updated in place)")
+    print(f"📊 Total chunks indexed: {total}")
+    print(f"♻️  Skipped {len(unchanged)} unchanged files / {reused_chunks} chunks; "
+          f"embedded {embedded_chunks} chunks, removed {sum(len(v) for v in remove_ids.values())}")
+    print(f"🧠 Embeddings: {embeddings.computed} computed, {embeddings.reused} reused from the store, "
+          f"{pooled_chunks} chunk vectors pooled from sentence windows")
+
+    return manifest
 
 
 if __name__ == '__main__':
-    # Default paths for standalone execution
-    folder_path = "data/references"
-    persist_path = "data/vector_db"
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--folder", default="data/references")
+    parser.add_argument("--persist", default="data/vector_db")
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--workers", type=int, default=None, help="partitioning processes (default: CPU count)")
+    parser.add_argument("--stage", default=None, help="intermediate results dir (default: <persist>.stage)")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and rebuild every shard")
+    parser.add_argument("--no-pool", action="store_true", help="embed every chunk instead of pooling sentence-window vectors")
+    args = parser.parse_args()
+
     ingest_folder(
-        folder_path=folder_path,
-        persist_path=persist_path
-    )
\ No newline at end of file
+        folder_path=args.folder,
+        persist_path=args.persist,
+        index_type=args.index_type,
+        workers=args.workers,
+        stage_path=args.stage,
+        batch_size=args.batch_size,
+        rebuild=args.rebuild,
+        pool=not args.no_pool,
+    )
@@ -0,0 +1,352 @@
+"""Offline load test: drive app.main:app at a fixed RPS / concurrency against the stub Ollama server and report latency percentiles, RSS and Redis ops."""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stub_ollama
+
+try:
+    import httpx
+except ImportError:  # benchmark-only dependency
+    httpx = None
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "intent_examples.jsonl")
+NODE_METRIC = "helpdesk_node_latency_seconds"
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+def load_queries(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+def request_body(endpoint: str, query: str) -> dict:
+    # Fresh thread per request, like production traffic
+    return {"query": query}
+
+
+# -----------------------------
+# Server-side measurements
+# -----------------------------
+def rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+def redis_commands(redis_url: str):
+    try:
+        import redis
+        return int(redis.from_url(redis_url).info("stats")["total_commands_processed"])
+    except Exception as e:
+        print(f"⚠️  Redis stats unavailable: {e}")
+        return None
+
+def node_buckets(metrics_text: str) -> dict:
+    """{node: [(upper bound, cumulative count), ...]} from the node latency histogram."""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    buckets = defaultdict(list)
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != NODE_METRIC:
+            continue
+        for sample in family.samples:
+            if sample.name == f"{NODE_METRIC}_bucket":
+                buckets[sample.labels["node"]].append((float(sample.labels["le"]), sample.value))
+    return {node: sorted(b) for node, b in buckets.items()}
+
+def histogram_quantile(q: float, buckets: list):
+    """Prometheus-style quantile estimate (linear within the bucket) from cumulative buckets."""
+    if not buckets or buckets[-1][1] == 0:
+        return None
+    rank = q * buckets[-1][1]
+    prev_bound, prev_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return prev_bound
+            if count == prev_count:
+                return bound
+            return prev_bound + (bound - prev_bound) * (rank - prev_count) / (count - prev_count)
+        prev_bound, prev_count = bound, count
+    return prev_bound
+
+def node_deltas(before: dict, after: dict) -> dict:
+    deltas = {}
+    for node, buckets in after.items():
+        old = dict(before.get(node, []))
+        deltas[node] = [(bound, count - old.get(bound, 0.0)) for bound, count in buckets]
+    return deltas
+
+
+# -----------------------------
+# Load generator
+# -----------------------------
+async def run_load(base_url: str, endpoints: list, queries: list, rps: float, concurrency: int,
+                   total: int, cold: bool, timeout: float, rss_pid: int = None):
+    """
+    Open-loop schedule: request i is due at start + i / rps. Latency is taken
+    from the due time, so time spent waiting for a free concurrency slot
+    counts (no coordinated omission). For SSE endpoints (ending in /stream) the time
+    to the first answer token is recorded as well.
+    """
+    results = defaultdict(list)
+    ttft = defaultdict(list)
+    errors = defaultdict(int)
+    run_id = uuid.uuid4().hex[:8]
+    rss_samples = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def sample_rss():
+        while True:
+            value = rss_mb(rss_pid)
+            if value is not None:
+                rss_samples.append(value)
+            await asyncio.sleep(0.5)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one_stream(endpoint: str, query: str, due: float) -> bool:
+            first_token = None
+            async with client.stream("POST", endpoint, json=request_body(endpoint, query)) as response:
+                if response.status_code != 200:
+                    return False
+                async for line in response.aiter_lines():
+                    if line == "event: token" and first_token is None:
+                        first_token = time.perf_counter() - due
+                    elif line == "event: error":
+                        return False
+            if first_token is not None:
+                ttft[endpoint].append(first_token)
+            return True
+
+        async def one(i: int, due: float):
+            endpoint = endpoints[i % len(endpoints)]
+            query = queries[i % len(queries)]
+            if cold:
+                query = f"{query} (#{run_id}-{i})"  # defeat the result / retrieval caches, across runs too
+            async with slots:
+                try:
+                    if endpoint.endswith("/stream"):
+                        ok = await one_stream(endpoint, query, due)
+                    else:
+                        response = await client.post(endpoint, json=request_body(endpoint, query))
+                        await response.aread()
+                        ok = response.status_code == 200
+                except Exception:
+                    ok = False
+            if ok:
+                results[endpoint].append(time.perf_counter() - due)
+            else:
+                errors[endpoint] += 1
+
+        sampler = asyncio.create_task(sample_rss()) if rss_pid else None
+        start = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            due = start + i / rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, due)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        if sampler:
+            sampler.cancel()
+
+    return results, ttft, errors, elapsed, rss_samples
+
+
+# -----------------------------
+# Orchestration
+# -----------------------------
+def start_server(app: str, port: int, ollama_url: str):
+    env = {**os.environ, "OLLAMA_HOST": ollama_url}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    return proc
+
+def wait_ready(base_url: str, timeout: float, proc=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode} before becoming ready")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    arr = np.asarray(values) * 1000
+    return {f"p{q}": float(np.percentile(arr, q)) for q in (50, 95, 99)}
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:8.1f}"
+
+def report(summary: dict):
+    print(f"\n📊 {summary['completed']} ok / {summary['errors']} errors in {summary['elapsed_s']:.1f}s "
+          f"({summary['throughput_rps']:.1f} req/s, target {summary['target_rps']} req/s, concurrency {summary['concurrency']})")
+    print(f"\n{'endpoint':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"{endpoint:<24}{stats['count']:>8}  {_fmt(stats['p50'])}  {_fmt(stats['p95'])}  {_fmt(stats['p99'])}")
+    for endpoint, stats in summary["ttft"].items():
+        label = f"{endpoint} (ttft)"
+        print(f"{label:<24}{stats['count']:>8}  {_fmt(stats['p50'])}  {_fmt(stats['p95'])}  {_fmt(stats['p99'])}")
+    if summary["nodes"]:
+        print(f"\n{'node (histogram est.)':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for node, stats in summary["nodes"].items():
+            print(f"{node:<24}{stats['count']:>8}  {_fmt(stats['p50'])}  {_fmt(stats['p95'])}  {_fmt(stats['p99'])}")
+    rss = summary["rss_mb"]
+    if rss:
+        print(f"\n🧠 RSS MB: start {rss['start']:.0f}, peak {rss['peak']:.0f}, end {rss['end']:.0f}")
+    if summary["redis_ops_per_request"] is not None:
+        print(f"🗄️  Redis commands per request: {summary['redis_ops_per_request']:.1f}")
+    print(f"🧪 Stub LLM calls: {summary['llm_calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=None, help="test an already running server instead of starting one")
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ollama-url", default=None, help="use this Ollama (or stub) instead of starting the stub")
+    parser.add_argument("--latency", default="", help="stub latency per purpose, e.g. intent=150,generate=800,evaluate=300")
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--endpoints", default="/helpdesk", help="comma separated, requests are spread round-robin")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="jsonl file with a 'query' per line")
+    parser.add_argument("--rps", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5, help="sequential requests before measuring")
+    parser.add_argument("--cold", action="store_true", help="make every query unique so caches miss")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--pid", type=int, default=None, help="server pid for RSS when using --url")
+    parser.add_argument("--json", default=None, help="write the summary here for release-to-release comparison")
+    args = parser.parse_args()
+
+    if httpx is None:
+        raise SystemExit("loadtest needs httpx: pip install httpx")
+
+    from app.config import settings
+    redis_url = args.redis_url or settings.REDIS_URL
+
+    stub = None
+    ollama_url = args.ollama_url
+    if ollama_url is None:
+        stub = stub_ollama.serve(
+            port=0,
+            config=stub_ollama.StubConfig(stub_ollama.parse_latency(args.latency), token_ms=args.token_ms),
+            background=True,
+        )
+        ollama_url = f"http://127.0.0.1:{stub.server_port}"
+        print(f"🧪 Stub Ollama on {ollama_url}")
+
+    proc = None
+    base_url = args.url
+    pid = args.pid
+    if base_url is None:
+        proc = start_server(args.app, args.port, ollama_url)
+        base_url = f"http://127.0.0.1:{args.port}"
+        pid = proc.pid
+
+    try:
+        print(f"⏳ Waiting for {base_url} ...")
+        wait_ready(base_url, timeout=300, proc=proc)
+        endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+        queries = load_queries(args.queries)
+
+        # Warm-up: model loading, first-touch of the index and connection pools
+        if args.warmup:
+            asyncio.run(run_load(base_url, endpoints, queries, rps=1000, concurrency=1,
+                                 total=args.warmup, cold=True, timeout=args.timeout))
+
+        metrics_before = node_buckets(httpx.get(f"{base_url}/metrics").text)
+        calls_before = dict(stub.config.calls) if stub is not None else {}
+        redis_before = redis_commands(redis_url)
+        rss_start = rss_mb(pid) if pid else None
+
+        print(f"🚀 {args.requests} requests at {args.rps} req/s, concurrency {args.concurrency}")
+        results, ttft, errors, elapsed, rss_samples = asyncio.run(run_load(
+            base_url, endpoints, queries, args.rps, args.concurrency, args.requests,
+            args.cold, args.timeout, rss_pid=pid,
+        ))
+
+        redis_after = redis_commands(redis_url)
+        metrics_after = node_buckets(httpx.get(f"{base_url}/metrics").text)
+        rss_end = rss_mb(pid) if pid else None
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+        if stub is not None:
+            stub.shutdown()
+
+    completed = sum(len(v) for v in results.values())
+    nodes = {}
+    for node, buckets in sorted(node_deltas(metrics_before, metrics_after).items()):
+        count = int(buckets[-1][1]) if buckets else 0
+        if count:
+            nodes[node] = {
+                "count": count,
+                **{f"p{int(q * 100)}": (lambda v: None if v is None else v * 1000)(histogram_quantile(q, buckets))
+                   for q in (0.5, 0.95, 0.99)},
+            }
+
+    summary = {
+        "target_rps": args.rps,
+        "concurrency": args.concurrency,
+        "cold": args.cold,
+        "elapsed_s": elapsed,
+        "completed": completed,
+        "errors": sum(errors.values()),
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "endpoints": {
+            e: {"count": len(results.get(e, [])), "errors": errors.get(e, 0), **percentiles(results.get(e, []))}
+            for e in endpoints
+        },
+        "ttft": {e: {"count": len(v), **percentiles(v)} for e, v in ttft.items()},
+        "nodes": nodes,
+        "rss_mb": {"start": rss_start, "peak": max(rss_samples), "end": rss_end} if rss_samples and rss_start else None,
+        # INFO itself is one command on each side
+        "redis_ops_per_request": (redis_after - redis_before - 1) / completed
+        if completed and redis_before is not None and redis_after is not None else None,
+        "llm_calls": {p: n - calls_before.get(p, 0) for p, n in stub.config.calls.items()} if stub is not None else {},
+    }
+    report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Local stand-in for the Ollama HTTP API: schema-valid structured answers with configurable latency, no model, no network."""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Purpose of a /api/chat call, recognised from the requested JSON schema
+PURPOSE_FIELDS = {"Intent": "intent", "answer": "generate", "confidence": "evaluate"}
+DEFAULT_LATENCY_MS = {"intent": 150, "generate": 800, "evaluate": 300, "generate_judge": 900, "other": 300}
+SOURCE_IDS = re.compile(r"\[source: ([^\]]+)\]")
+IT_WORDS = re.compile(r"\b(vpn|laptop|password|network|printer|software|email|wifi|wi-fi|install|it)\b", re.I)
+CANNED_ANSWER = "According to the knowledge base, please follow the documented policy and contact the helpdesk if the issue persists."
+
+
+class StubConfig:
+    def __init__(self, latency_ms=None, token_ms: float = 0.0, jitter: float = 0.1, confidence: float = 0.9, seed: int = 0):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.token_ms = token_ms
+        self.jitter = jitter
+        self.confidence = confidence
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def delay(self, purpose: str) -> float:
+        with self.lock:
+            self.calls[purpose] = self.calls.get(purpose, 0) + 1
+            factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency_ms.get(purpose, self.latency_ms["other"]) * factor / 1000)
+
+
+def _purpose(schema) -> str:
+    if not isinstance(schema, dict):
+        return "generate" if schema is None else "other"
+    if {"answer", "confidence"} <= set(schema.get("properties", {})):
+        return "generate_judge"
+    for field, purpose in PURPOSE_FIELDS.items():
+        if field in schema.get("properties", {}):
+            return purpose
+    return "other"
+
+def _fake_value(name: str, prop: dict, prompt: str, config: StubConfig):
+    if "enum" in prop:
+        options = prop["enum"]
+        if name == "Intent" and "IT_guidelines" in options:
+            return "IT_guidelines" if IT_WORDS.search(prompt) else "HR_Policy"
+        return options[0]
+    kind = prop.get("type")
+    if kind == "number":
+        return config.confidence
+    if kind == "integer":
+        return 1
+    if kind == "boolean":
+        return config.confidence >= 0.8
+    if kind == "array":
+        return SOURCE_IDS.findall(prompt)[:1]  # cite the first passage
+    if name == "answer":
+        return CANNED_ANSWER
+    return "Stubbed response."
+
+def fake_content(schema, prompt: str, config: StubConfig) -> str:
+    """A JSON object valid for `schema` (plain text when no schema was requested)."""
+    if not isinstance(schema, dict):
+        return CANNED_ANSWER
+    return json.dumps({
+        name: _fake_value(name, prop, prompt, config)
+        for name, prop in schema.get("properties", {}).items()
+    })
+
+def _tokens(text: str) -> list:
+    return re.findall(r"\S+\s*", text) or [text]
+
+
+def make_handler(config: StubConfig):
+    class OllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, payload: dict, status: int = 200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path in ("/", "/api/version"):
+                self._send_json({"version": "0.0.0-stub"})
+            elif self.path == "/api/tags":
+                self._send_json({"models": []})
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path != "/api/chat":
+                self._send_json({"error": f"{self.path} is not stubbed"}, 404)
+                return
+
+            messages = request.get("messages", [])
+            prompt = " ".join(m.get("content") or "" for m in messages)
+            schema = request.get("format")
+            purpose = _purpose(schema)
+            time.sleep(config.delay(purpose))
+
+            content = fake_content(schema, prompt, config)
+            tokens = _tokens(content)
+            base = {"model": request.get("model", "stub"), "created_at": datetime.now(timezone.utc).isoformat()}
+            final = {
+                **base,
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "done_reason": "stop",
+                "prompt_eval_count": len(prompt.split()),
+                "eval_count": len(tokens),
+            }
+
+            if not request.get("stream", True):
+                final["message"]["content"] = content
+                self._send_json(final)
+                return
+
+            # NDJSON stream, one token per line, like the real server
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                self._write_chunk({**base, "message": {"role": "assistant", "content": token}, "done": False})
+                if config.token_ms:
+                    time.sleep(config.token_ms / 1000)
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, payload: dict):
+            line = json.dumps(payload).encode() + b"\n"
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+
+    return OllamaHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 11435, config: StubConfig = None, background: bool = False):
+    """Start the stub; with background=True it runs on a daemon thread and the server is returned."""
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    if background:
+        threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+        return server
+    print(f"🧪 Stub Ollama listening on http://{host}:{server.server_port} (latency ms: {config.latency_ms})")
+    server.serve_forever()
+
+def parse_latency(spec: str) -> dict:
+    """'intent=150,generate=800' -> {'intent': 150.0, 'generate': 800.0}"""
+    latency = {}
+    for part in filter(None, (spec or "").split(",")):
+        purpose, ms = part.split("=")
+        latency[purpose.strip()] = float(ms)
+    return latency
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", default="", help="per purpose, e.g. intent=150,generate=800,evaluate=300")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="delay between streamed tokens")
+    parser.add_argument("--jitter", type=float, default=0.1, help="± fraction applied to each latency")
+    parser.add_argument("--confidence", type=float, default=0.9, help="EvaluationResult confidence to return")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, StubConfig(parse_latency(args.latency), args.token_ms, args.jitter, args.confidence))
@@ -0,0 +1,119 @@
+"""Train (or refresh) the nearest-centroid intent classifier from ingested shards and labelled example queries."""
+import argparse
+import json
+import os
+import sys
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.config import settings
+from app.vectorstore.load_vectorstore import load_embeddings, read_manifest
+from app.vectorstore.docstore import INDEX_FILE
+from app.vectorstore.intent_classifier import CENTROIDS_FILE, CentroidIntentClassifier, build_centroids
+
+
+def shard_vectors(persist_path: str, embeddings) -> dict:
+    """Chunk vectors per intent, read back from the persisted FAISS indexes."""
+    manifest = read_manifest(persist_path)
+    by_intent = {}
+
+    if manifest is None:
+        # Original single-index layout: group by chunk metadata
+        from langchain_community.vectorstores import FAISS
+        vs = FAISS.load_local(persist_path, embeddings, allow_dangerous_deserialization=True)
+        for pos, doc_id in vs.index_to_docstore_id.items():
+            intent = vs.docstore.search(doc_id).metadata.get("intent")
+            by_intent.setdefault(intent, []).append(vs.index.reconstruct(int(pos)))
+        return by_intent
+
+    for intent, info in manifest["shards"].items():
+        index = faiss.read_index(os.path.join(persist_path, info["path"], INDEX_FILE))
+        if info.get("index", {}).get("type") in ("ivf_flat", "ivf_pq"):
+            faiss.extract_index_ivf(index).make_direct_map()
+        by_intent[intent] = list(index.reconstruct_n(0, index.ntotal))
+    return by_intent
+
+def load_examples(path: str) -> list:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+def leave_one_out(vectors_by_label: dict, examples: list, example_vectors: list) -> list:
+    """
+    (label, margin) for each example from centroids built without it, so the
+    report isn't scored on the queries the centroids were fitted to. Same
+    centroids as build_centroids, minus one row from the example's label sum.
+    """
+    labels = sorted(vectors_by_label)
+    sums = {label: _unit(vectors_by_label[label]).sum(axis=0) for label in labels}
+    counts = {label: len(vectors_by_label[label]) for label in labels}
+
+    predictions = []
+    for example, vec in zip(examples, example_vectors):
+        held_out = example["intent"]
+        kept, centroids = [], []
+        for label in labels:
+            total, n = sums[label], counts[label]
+            if label == held_out:
+                total, n = total - _unit(vec), n - 1
+            if n == 0:
+                continue  # the held-out query was this label's only vector
+            kept.append(label)
+            centroids.append(total / (np.linalg.norm(total) or 1.0))
+        predictions.append(CentroidIntentClassifier(kept, np.vstack(centroids)).predict(vec))
+    return predictions
+
+def train(persist_path: str, examples_path: str, embedding_model: str, threshold: float):
+    embeddings = load_embeddings(embedding_model)
+
+    print(f"📂 Reading chunk vectors from: {persist_path}")
+    vectors_by_label = shard_vectors(persist_path, embeddings)
+
+    examples = load_examples(examples_path)
+    example_vectors = [embeddings.embed_query(e["query"]) for e in examples]
+    for example, vec in zip(examples, example_vectors):
+        vectors_by_label.setdefault(example["intent"], []).append(vec)
+
+    for label, vectors in vectors_by_label.items():
+        print(f"🏷️  {label}: {len(vectors)} vectors")
+
+    classifier = build_centroids(vectors_by_label)
+    out_path = os.path.join(persist_path, CENTROIDS_FILE)
+    classifier.save(out_path)
+    print(f"💾 Saved intent centroids to {out_path}")
+
+    # Report how the threshold would behave on the labelled queries (leave-one-out:
+    # each query is classified by centroids built without it)
+    if examples:
+        predictions = leave_one_out(vectors_by_label, examples, example_vectors)
+        margins = np.array([m for _, m in predictions])
+        correct = sum(label == e["intent"] for (label, _), e in zip(predictions, examples))
+        confident = margins >= threshold
+        confident_correct = sum(
+            label == e["intent"]
+            for (label, _), e, ok in zip(predictions, examples, confident) if ok
+        )
+        print(f"📊 Leave-one-out accuracy on examples: {correct}/{len(examples)}")
+        print(f"📊 Margin p10/p50/p90: {np.percentile(margins, [10, 50, 90]).round(3).tolist()}")
+        print(f"📊 Leave-one-out LLM fallback rate at threshold {threshold}: {1 - confident.mean():.1%}")
+        print(f"📊 Leave-one-out accuracy when answered locally: {confident_correct}/{int(confident.sum())}")
+
+    return classifier
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persist", default="data/vector_db")
+    parser.add_argument("--examples", default="data/intent_examples.jsonl")
+    parser.add_argument("--embedding-model", default="Qwen/Qwen3-Embedding-4B")
+    parser.add_argument("--threshold", type=float, default=settings.INTENT_MARGIN_THRESHOLD)
+    args = parser.parse_args()
+
+    train(args.persist, args.examples, args.embedding_model, args.threshold)